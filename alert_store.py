@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class AlertStore:
+    """
+    Durable record of alerts already sent, keyed by (symbol, direction, candle timestamp).
+    Backed by SQLite in WAL mode so restarts and `--once` runs remember past alerts;
+    the live keys are also mirrored in a set so lookups are O(1).
+    An alert is claimed (pending) before it is sent and confirmed once delivered. Claims
+    still pending when the store is opened were left by a process that died before
+    delivering them, so they are dropped and the alert can fire again.
+    Entries older than 'ttl_days' are compacted away on open and via compact().
+    """
+
+    def __init__(self, path, ttl_days=3):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alerts ("
+            " symbol TEXT NOT NULL, direction TEXT NOT NULL, candle_ts TEXT NOT NULL, sent_at REAL NOT NULL,"
+            " delivered INTEGER NOT NULL DEFAULT 1,"
+            " PRIMARY KEY (symbol, direction, candle_ts)) WITHOUT ROWID"
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(alerts)")]
+        if "delivered" not in columns:
+            # Stores written before claims had a pending state only hold sent alerts
+            self.conn.execute("ALTER TABLE alerts ADD COLUMN delivered INTEGER NOT NULL DEFAULT 1")
+        unconfirmed = self.conn.execute("DELETE FROM alerts WHERE delivered = 0").rowcount
+        self.conn.commit()
+        if unconfirmed:
+            logger.warning(f"Dropped {unconfirmed} alert claims never confirmed as delivered")
+
+        self.compact()
+        self._keys = set(self.conn.execute("SELECT symbol, direction, candle_ts FROM alerts"))
+        logger.info(f"Alert store opened with {len(self._keys)} recent alerts")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def seen(self, symbol, direction, timestamp):
+        return (symbol, direction, str(timestamp)) in self._keys
+
+    def claim(self, symbol, direction, timestamp):
+        """
+        Records an alert as pending delivery. Returns False if it had already been recorded
+        (i.e. a duplicate). Call confirm() once it was sent, or release() if it was not.
+        """
+        key = (symbol, direction, str(timestamp))
+        with self._lock:
+            if key in self._keys:
+                return False
+            self.conn.execute("INSERT OR IGNORE INTO alerts VALUES (?, ?, ?, ?, 0)", key + (time.time(),))
+            self.conn.commit()
+            self._keys.add(key)
+        return True
+
+    def confirm(self, symbol, direction, timestamp):
+        """
+        Marks a claimed alert as delivered.
+        """
+        with self._lock:
+            self.conn.execute(
+                "UPDATE alerts SET delivered = 1 WHERE symbol = ? AND direction = ? AND candle_ts = ?",
+                (symbol, direction, str(timestamp)),
+            )
+            self.conn.commit()
+
+    def release(self, symbol, direction, timestamp):
+        """
+        Forgets a claimed alert that could not be sent, so a later cycle can claim it again.
+        """
+        key = (symbol, direction, str(timestamp))
+        with self._lock:
+            self.conn.execute("DELETE FROM alerts WHERE symbol = ? AND direction = ? AND candle_ts = ?", key)
+            self.conn.commit()
+            self._keys.discard(key)
+
+    def compact(self):
+        """
+        Deletes alerts older than the TTL.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            deleted = self.conn.execute("DELETE FROM alerts WHERE sent_at < ?", (cutoff,)).rowcount
+            self.conn.commit()
+            if deleted and hasattr(self, "_keys"):
+                self._keys = set(self.conn.execute("SELECT symbol, direction, candle_ts FROM alerts"))
+        if deleted:
+            logger.info(f"Compacted {deleted} expired alerts")
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import time
+from alert_store import AlertStore
+
+def benchmark_lookups():
+    print("--- Alert Store Lookup Benchmark ---")
+    
+    path = os.path.join(tempfile.mkdtemp(), "alerts.sqlite3")
+    store = AlertStore(path)
+    lookups = 100000
+    inserted = 0
+    
+    # Grow the store in steps and time the same number of lookups at each size.
+    # Lookup cost should stay flat as the store grows.
+    for size in [1000, 10000, 100000, 500000]:
+        for i in range(inserted, size):
+            key = (f"NSE:SYM{i}", "BULLISH", f"2024-01-01 09:{i % 60:02d}:00")
+            if store.claim(*key):
+                store.confirm(*key)
+        inserted = size
+        
+        start = time.perf_counter()
+        for i in range(lookups):
+            store.seen(f"NSE:SYM{i % size}", "BULLISH", f"2024-01-01 09:{i % 60:02d}:00")
+        elapsed = time.perf_counter() - start
+        
+        print(f"{size:>8} entries: {elapsed / lookups * 1e9:8.1f} ns/lookup")
+
+    start = time.perf_counter()
+    reopened = AlertStore(path)
+    print(f"Reopen with {len(reopened)} entries: {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    benchmark_lookups()
@@ -0,0 +1,54 @@
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from candle_frame import CandleFrame
+
+def make_payload(n):
+    """
+    Builds a synthetic getCandleData payload of 'n' 5-minute candles.
+    """
+    start = datetime(2024, 1, 1, 9, 15)
+    rng = np.random.default_rng(0)
+    closes = np.round(20000 + np.cumsum(rng.normal(0, 10, n)), 2)
+    return [
+        [(start + timedelta(minutes=5 * i)).strftime("%Y-%m-%dT%H:%M:%S+05:30"),
+         float(c), float(c) + 5, float(c) - 5, float(c), int(rng.integers(1000, 100000))]
+        for i, c in enumerate(closes)
+    ]
+
+def legacy_parse(rows):
+    # The original get_5min_candles path
+    df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
+    df['close'] = df['close'].astype(float)
+    return df
+
+def best_of(fn, rows, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def benchmark_parse():
+    print("--- Candle Parse Benchmark (best of 5) ---")
+    print(f"{'candles':>8} {'legacy':>10} {'frame':>10} {'frame+df':>10} {'speedup':>8}")
+    
+    for n in [375, 5000, 50000]:
+        rows = make_payload(n)
+        
+        # Sanity check: both paths must agree
+        legacy = legacy_parse(rows)
+        fast = CandleFrame.from_payload(rows).to_dataframe()
+        assert (legacy['timestamp'].values.astype("datetime64[ns]") == fast['timestamp'].values).all()
+        assert (legacy['close'].values == fast['close'].values).all()
+        
+        t_legacy = best_of(legacy_parse, rows)
+        t_frame = best_of(CandleFrame.from_payload, rows)
+        t_frame_df = best_of(lambda r: CandleFrame.from_payload(r).to_dataframe(), rows)
+        print(f"{n:>8} {t_legacy * 1e3:>8.2f}ms {t_frame * 1e3:>8.2f}ms {t_frame_df * 1e3:>8.2f}ms {t_legacy / t_frame:>7.1f}x")
+
+if __name__ == "__main__":
+    benchmark_parse()
@@ -0,0 +1,152 @@
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from smartapi_stub import SmartApiStub
+from telegram_stub import TelegramStub
+
+workdir = tempfile.mkdtemp(prefix="scan-load-")
+api_stub = None
+telegram_stub = None
+
+
+def start_stubs(args):
+    """
+    Starts the SmartAPI and Telegram stubs and points the configuration at them.
+    Must run before config (and therefore main) is imported.
+    """
+    global api_stub, telegram_stub
+    api_stub = SmartApiStub(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.stub_rate_limit
+    ).start()
+    telegram_stub = TelegramStub().start()
+    os.environ.update({
+        "SMARTAPI_ROOT_URL": api_stub.url,
+        "SMARTAPI_API_KEY": "bench", "SMARTAPI_CLIENT_ID": "BENCH", "SMARTAPI_MPIN": "0000",
+        "SMARTAPI_TOTP_SECRET": "JBSWY3DPEHPK3PXP",
+        "SESSION_CACHE_PATH": os.path.join(workdir, "session.json"),
+        "TELEGRAM_API_URL": telegram_stub.url, "TELEGRAM_BOT_TOKEN": "bench", "TELEGRAM_CHAT_ID": "bench",
+        "ALERT_DB_PATH": os.path.join(workdir, "alerts.sqlite3"),
+        "CANDLE_CACHE_DIR": os.path.join(workdir, "candles"),
+        "SCHEDULER_SETTLE_SECONDS": "0",
+        "POLL_MAX_BARS": str(args.poll_max_bars),
+    })
+
+
+def run_size(main, client, size):
+    """
+    Runs a cold cycle (full warm-up fetch for every symbol) and a warm, incremental cycle
+    for 'size' synthetic symbols. Returns the measurements for this size.
+    """
+    from candle_store import CandleStore
+    from alert_store import AlertStore
+
+    main.SYMBOLS_MAP.clear()
+    main.SYMBOLS_MAP.update({f"NSE:BENCH{i}": {"token": str(100000 + i), "exchange": "NSE"} for i in range(size)})
+    main.crossover_states.clear()
+    main.universe = None
+    if main.poll_scheduler is not None:
+        main.poll_scheduler.next_poll.clear()
+    main.candle_store = CandleStore(os.path.join(workdir, f"candles-{size}"), interval_minutes=main.base_minutes)
+    main.alert_store = AlertStore(os.path.join(workdir, f"alerts-{size}.sqlite3"))
+
+    result = {"symbols": size}
+    for phase in ["cold", "warm"]:
+        alerts_before = main.metrics.counters.get("alerts_total", 0)
+        requests_before = api_stub.requests
+        started = time.perf_counter()
+        main.job(client)
+        elapsed = time.perf_counter() - started
+        alerts = main.metrics.counters.get("alerts_total", 0) - alerts_before
+        result[f"{phase}_seconds"] = round(elapsed, 4)
+        result[f"{phase}_requests"] = api_stub.requests - requests_before
+        result[f"{phase}_alerts"] = alerts
+        result[f"{phase}_alerts_per_second"] = round(alerts / elapsed, 2) if elapsed else 0.0
+
+    # High-water mark of the process; sizes run in increasing order
+    result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Flags sizes whose cycle time regressed by more than 'tolerance' against a saved run.
+    """
+    with open(baseline_path) as f:
+        baseline = {row["symbols"]: row for row in json.load(f)}
+
+    regressions = []
+    for row in results:
+        base = baseline.get(row["symbols"])
+        if base is None:
+            continue
+        for key in ["cold_seconds", "warm_seconds"]:
+            if row[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{row['symbols']} symbols {key}: {base[key]:.3f}s -> {row[key]:.3f}s")
+    return regressions
+
+
+def benchmark_scan_load():
+    parser = argparse.ArgumentParser(description="Scan cycle load test against local SmartAPI/Telegram stubs")
+    parser.add_argument("--sizes", default="10,100,1000,5000", help="Comma-separated watchlist sizes")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub latency per request (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stub latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of candle requests answered with AB1004")
+    parser.add_argument("--stub-rate-limit", type=int, default=0, help="Stub requests/second per API key (0 = unlimited)")
+    parser.add_argument("--poll-max-bars", type=int, default=1, help="Adaptive polling: poll each symbol at least every N bars (1 = off)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Client-side SmartAPI rate limit (requests/second)")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to FILE (use as a later --baseline)")
+    parser.add_argument("--baseline", metavar="FILE", help="Fail if cycle times regress against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs. the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    start_stubs(args)
+    import main
+    from smartapi_client import SmartApiClient
+    from rate_limiter import RateLimiter
+
+    # Per-symbol INFO lines would dominate the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+    # The stubs serve a fixed history; treat the market as open so every cycle scans
+    main.is_market_open = lambda: True
+    main.alert_dispatcher.start()
+
+    client = SmartApiClient(rate_limiter=RateLimiter(args.rate))
+    if not client.login():
+        print("Login against the SmartAPI stub failed")
+        return 1
+
+    print("--- Scan Cycle Load Benchmark ---")
+    print(f"{'symbols':>8} {'cold':>9} {'warm':>9} {'requests':>9} {'alerts':>7} {'alerts/s':>9} {'max rss':>9}")
+    results = []
+    for size in [int(part) for part in args.sizes.split(",")]:
+        row = run_size(main, client, size)
+        results.append(row)
+        print(
+            f"{size:>8} {row['cold_seconds']:>8.2f}s {row['warm_seconds']:>8.2f}s {row['cold_requests']:>9} "
+            f"{row['cold_alerts']:>7} {row['cold_alerts_per_second']:>9.1f} {row['max_rss_mb']:>7.1f}MB"
+        )
+
+    main.alert_dispatcher.close()
+    print(f"SmartAPI stub: {api_stub.requests} requests, {api_stub.throttled} throttled, {api_stub.injected_errors} injected errors")
+    print(f"Telegram stub: {len(telegram_stub.messages)} messages delivered")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_scan_load())
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from smartapi_stub import SmartApiStub
+
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+workdir = tempfile.mkdtemp(prefix="startup-")
+
+# Runs in a fresh interpreter; prints wall-clock milestones for the parent to subtract
+IMPORT_MAIN = """
+import json, time
+started = time.perf_counter()
+import main
+print("BENCH " + json.dumps({"import_main": time.perf_counter() - started}))
+"""
+
+FIRST_FETCH = """
+import json, time
+marks = {}
+import main
+marks["imported"] = time.time()
+client = main.SmartApiClient()
+if not client.login():
+    raise SystemExit("login failed")
+marks["session"] = time.time()
+client.get_5min_candles("99926000", "NSE")
+marks["first_fetch"] = time.time()
+print("BENCH " + json.dumps(marks))
+"""
+
+
+def child_env(api_stub, holidays_file):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": repo_dir,
+        "SMARTAPI_ROOT_URL": api_stub.url,
+        "SMARTAPI_API_KEY": "bench", "SMARTAPI_CLIENT_ID": "BENCH", "SMARTAPI_MPIN": "0000",
+        "SMARTAPI_TOTP_SECRET": "JBSWY3DPEHPK3PXP",
+        "SESSION_CACHE_PATH": os.path.join(workdir, "session.json"),
+        "TELEGRAM_BOT_TOKEN": "bench", "TELEGRAM_CHAT_ID": "bench",
+        "ALERT_DB_PATH": os.path.join(workdir, "alerts.sqlite3"),
+        "CANDLE_CACHE_DIR": os.path.join(workdir, "candles"),
+        "ARCHIVE_DIR": os.path.join(workdir, "archive"),
+        "HOLIDAYS_FILE": holidays_file,
+        "LOG_LEVEL": "WARNING",
+    })
+    return env
+
+
+def run_child(args, env):
+    """
+    Runs one child interpreter (in the scratch directory, so its logs stay out of the repo).
+    Returns (wall seconds, start time, parsed BENCH payload or None).
+    """
+    started = time.time()
+    proc = subprocess.run([sys.executable] + args, cwd=workdir, env=env, capture_output=True, text=True)
+    wall = time.time() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args[:2])} exited with {proc.returncode}: {proc.stderr.strip()[-500:]}")
+    payload = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            payload = json.loads(line[len("BENCH "):])
+    return wall, started, payload
+
+
+def measure(runs, api_stub):
+    """
+    Median of 'runs' fresh processes for each startup path:
+    - interpreter: `python -c pass`, the floor every run pays
+    - closed_once: `main.py --once` on a non-trading day (calendar fast path, no heavy imports)
+    - import_main: importing main with all scan dependencies
+    - first_fetch_cold / first_fetch_warm: process start to the first candle response,
+      without and with a persisted session to reuse
+    """
+    closed = os.path.join(workdir, "closed.txt")
+    with open(closed, "w") as f:
+        f.write(time.strftime("%Y-%m-%d\n", time.gmtime(time.time() + 5.5 * 3600)))
+    closed_env = child_env(api_stub, closed)
+    open_env = child_env(api_stub, os.path.join(workdir, "no-holidays.txt"))
+    session_path = open_env["SESSION_CACHE_PATH"]
+
+    samples = {name: [] for name in ["interpreter", "closed_once", "import_main", "first_fetch_cold", "first_fetch_warm", "session_warm"]}
+    for _ in range(runs):
+        samples["interpreter"].append(run_child(["-c", "pass"], open_env)[0])
+        samples["closed_once"].append(run_child([os.path.join(repo_dir, "main.py"), "--once"], closed_env)[0])
+        samples["import_main"].append(run_child(["-c", IMPORT_MAIN], open_env)[2]["import_main"])
+
+        if os.path.exists(session_path):
+            os.remove(session_path)
+        logins = api_stub.logins
+        _, started, marks = run_child(["-c", FIRST_FETCH], open_env)
+        samples["first_fetch_cold"].append(marks["first_fetch"] - started)
+        assert api_stub.logins > logins, "cold run should log in"
+
+        logins = api_stub.logins
+        _, started, marks = run_child(["-c", FIRST_FETCH], open_env)
+        samples["first_fetch_warm"].append(marks["first_fetch"] - started)
+        samples["session_warm"].append(marks["session"] - marks["imported"])
+        assert api_stub.logins == logins, "warm run should reuse the persisted session"
+
+    return {name: round(statistics.median(values), 4) for name, values in samples.items()}
+
+
+def benchmark_startup():
+    parser = argparse.ArgumentParser(description="Startup time: import cost and time to first candle fetch")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement (median reported)")
+    parser.add_argument("--latency", type=float, default=0.0, help="SmartAPI stub latency per request (seconds)")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to FILE (use as a later --baseline)")
+    parser.add_argument("--baseline", metavar="FILE", help="Fail if any timing regresses against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs. the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    api_stub = SmartApiStub(latency=args.latency).start()
+    results = measure(args.runs, api_stub)
+    api_stub.stop()
+
+    labels = {
+        "interpreter": "python -c pass",
+        "closed_once": "--once, market closed",
+        "import_main": "import main",
+        "first_fetch_cold": "first fetch, new session",
+        "first_fetch_warm": "first fetch, cached session",
+        "session_warm": "  of which session restore",
+    }
+    print("--- Startup Benchmark ---")
+    for name, label in labels.items():
+        print(f"{label:<30} {results[name] * 1000:>9.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{name}: {baseline[name] * 1000:.1f}ms -> {value * 1000:.1f}ms"
+            for name, value in results.items()
+            if name in baseline and value > baseline[name] * (1 + args.tolerance)
+        ]
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_startup())
@@ -0,0 +1,269 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from utils import get_logger, get_ist_time
+
+logger = get_logger(__name__)
+
+ARCHIVE_DTYPE = np.dtype([
+    ("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"),
+])
+
+# Longest date range SmartAPI serves in one getCandleData request, per interval
+MAX_DAYS_PER_REQUEST = {
+    "ONE_MINUTE": 30, "THREE_MINUTE": 60, "FIVE_MINUTE": 100, "TEN_MINUTE": 100,
+    "FIFTEEN_MINUTE": 200, "THIRTY_MINUTE": 200, "ONE_HOUR": 400,
+}
+
+
+def month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+
+def next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+def months_between(start, end):
+    """
+    Returns the first day of every calendar month touched by [start, end).
+    """
+    months = []
+    month = month_start(start)
+    while month < end:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+class CandleArchive:
+    """
+    Long-term candle history on disk, partitioned per symbol and calendar month:
+    root/<INTERVAL>/<EXCHANGE>_<token>/<YYYY-MM>.npy, each a time-sorted structured array
+    (int64 epoch-ns IST timestamps plus float64 OHLCV) that is read with mmap_mode="r".
+    A per-symbol manifest lists the months fetched after they ended; those are never
+    requested again, so an interrupted backfill resumes where it stopped. For a month
+    still in progress it records how far every chunk came back ("partial").
+    """
+
+    def __init__(self, root, interval="FIVE_MINUTE"):
+        self.root = root
+        self.interval = interval
+        # Symbol-months of one symbol are fetched in parallel and share its manifest
+        self._manifest_lock = threading.Lock()
+
+    def _dir(self, token, exchange):
+        return os.path.join(self.root, self.interval, f"{exchange}_{token}")
+
+    def _path(self, token, exchange, month):
+        return os.path.join(self._dir(token, exchange), f"{month.strftime('%Y-%m')}.npy")
+
+    def _manifest_path(self, token, exchange):
+        return os.path.join(self._dir(token, exchange), "manifest.json")
+
+    def _manifest(self, token, exchange):
+        try:
+            with open(self._manifest_path(token, exchange)) as f:
+                manifest = json.load(f)
+            return set(manifest["complete"]), manifest.get("partial", {})
+        except (OSError, ValueError, KeyError):
+            return set(), {}
+
+    def complete_months(self, token, exchange):
+        return self._manifest(token, exchange)[0]
+
+    def partial_months(self, token, exchange):
+        return self._manifest(token, exchange)[1]
+
+    def stored_months(self, token, exchange):
+        directory = self._dir(token, exchange)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(datetime.strptime(name[:-4], "%Y-%m") for name in os.listdir(directory) if name.endswith(".npy"))
+
+    def has_month(self, token, exchange, month):
+        return os.path.exists(self._path(token, exchange, month))
+
+    def read_month(self, token, exchange, month):
+        """
+        Returns the month's candles as a read-only memory-mapped structured array, or None.
+        """
+        path = self._path(token, exchange, month)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def write_month(self, token, exchange, month, df, complete=False, fetched_to=None):
+        """
+        Stores one month of candles (merged and de-duplicated by the caller) atomically.
+        'complete' records the month in the manifest so it is skipped from now on;
+        otherwise 'fetched_to' (or None after a failed chunk) records how far it is whole.
+        """
+        directory = self._dir(token, exchange)
+        os.makedirs(directory, exist_ok=True)
+
+        records = np.empty(len(df), dtype=ARCHIVE_DTYPE)
+        records["timestamp"] = df["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        for col in ["open", "high", "low", "close", "volume"]:
+            records[col] = df[col].to_numpy(dtype=np.float64)
+
+        path = self._path(token, exchange, month)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, records)
+        os.replace(tmp_path, path)
+
+        key = month.strftime("%Y-%m")
+        with self._manifest_lock:
+            done, partial = self._manifest(token, exchange)
+            partial.pop(key, None)
+            if complete:
+                done.add(key)
+            elif fetched_to is not None:
+                partial[key] = fetched_to.isoformat()
+            manifest_path = self._manifest_path(token, exchange)
+            with open(f"{manifest_path}.tmp", "w") as f:
+                json.dump({"interval": self.interval, "complete": sorted(done), "partial": partial}, f)
+            os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    def covers(self, token, exchange, start, end, now=None):
+        """
+        True if the archive holds all of [start, end): every month touched is complete, or
+        (the current month) was fetched without gaps up to 'end' or 'now', whichever is earlier.
+        Months left partial by a failed chunk never count.
+        """
+        now = now or get_ist_time().replace(tzinfo=None)
+        done, partial = self._manifest(token, exchange)
+        for month in months_between(start, end):
+            key = month.strftime("%Y-%m")
+            if key in done:
+                continue
+            needed = min(end, next_month(month) - timedelta(minutes=1), now)
+            if key not in partial or datetime.fromisoformat(partial[key]) < needed:
+                return False
+        return True
+
+    def read(self, token, exchange, start=None, end=None):
+        """
+        Returns the archived candles in [start, end) as a DataFrame in the usual candle layout,
+        or None if nothing is archived for that range.
+        """
+        if start is None or end is None:
+            stored = self.stored_months(token, exchange)
+            if not stored:
+                return None
+            start = start or stored[0]
+            end = end or next_month(stored[-1])
+
+        lo = np.datetime64(start, "ns").astype(np.int64)
+        hi = np.datetime64(end, "ns").astype(np.int64)
+        parts = []
+        for month in months_between(start, end):
+            records = self.read_month(token, exchange, month)
+            if records is None or len(records) == 0:
+                continue
+            # Months are sorted, so the requested range is one contiguous slice
+            timestamps = records["timestamp"]
+            parts.append(records[np.searchsorted(timestamps, lo):np.searchsorted(timestamps, hi)])
+
+        if not parts:
+            return None
+        records = np.concatenate(parts)
+        df = pd.DataFrame({col: records[col] for col in ["open", "high", "low", "close", "volume"]})
+        df.insert(0, "timestamp", records["timestamp"].view("datetime64[ns]"))
+        return df
+
+
+def _backfill_month(client, archive, token, exchange, month, now):
+    """
+    Fetches one symbol-month in API-sized chunks and writes it to the archive.
+    A month stored without gaps up to some point (e.g. the current one) resumes from
+    there; one left with a failed chunk is fetched again from its start.
+    Returns the number of candles stored.
+    """
+    month_end = next_month(month)
+    fetch_from = month
+    existing = archive.read(token, exchange, month, month_end)
+    fetched_to = archive.partial_months(token, exchange).get(month.strftime("%Y-%m"))
+    if existing is not None and len(existing) > 0 and fetched_to is not None:
+        fetch_from = min(existing["timestamp"].iloc[-1].to_pydatetime(), datetime.fromisoformat(fetched_to))
+
+    chunk = timedelta(days=MAX_DAYS_PER_REQUEST.get(archive.interval, 30))
+    fetch_to = min(month_end - timedelta(minutes=1), now)
+    frames = [] if existing is None else [existing]
+    fetched_all = True
+    chunk_start = fetch_from
+    while chunk_start < fetch_to:
+        chunk_end = min(chunk_start + chunk, fetch_to)
+        df = client.get_candles(token, exchange, archive.interval, from_date=chunk_start, to_date=chunk_end)
+        if df is None:
+            fetched_all = False
+        elif len(df) > 0:
+            frames.append(df)
+        chunk_start = chunk_end
+
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df["timestamp"] >= month) & (df["timestamp"] < month_end)]
+        df = df.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+    else:
+        df = pd.DataFrame({col: np.empty(0, dtype="datetime64[ns]" if col == "timestamp" else np.float64) for col in ARCHIVE_DTYPE.names})
+
+    # The month is final once it has ended and every chunk came back; otherwise the next
+    # run re-fetches it from its last stored candle
+    archive.write_month(
+        token, exchange, month, df, complete=fetched_all and month_end <= now,
+        fetched_to=fetch_to if fetched_all else None,
+    )
+    return len(df)
+
+
+def backfill(client, archive, symbols_map, start, end, max_workers=4):
+    """
+    Downloads history for every symbol between 'start' and 'end' into 'archive'.
+    Work is split into symbol-month tasks fetched concurrently (request pacing is left to
+    the client's RateLimiter). Months already completed are skipped, so re-running the
+    same command after an interruption only fetches what is missing.
+    Returns (months fetched, candles stored, months failed).
+    """
+    now = get_ist_time().replace(tzinfo=None)
+    end = min(end, now)
+    tasks = []
+    for symbol_name, details in symbols_map.items():
+        done = archive.complete_months(details["token"], details["exchange"])
+        for month in months_between(start, end):
+            if month.strftime("%Y-%m") not in done:
+                tasks.append((symbol_name, details, month))
+
+    skipped = len(symbols_map) * len(months_between(start, end)) - len(tasks)
+    logger.info(f"Backfill: {len(tasks)} symbol-months to fetch, {skipped} already archived")
+
+    started = time.perf_counter()
+    fetched = candles = failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_backfill_month, client, archive, details["token"], details["exchange"], month, now): (symbol_name, month)
+            for symbol_name, details, month in tasks
+        }
+        for future in as_completed(futures):
+            symbol_name, month = futures[future]
+            try:
+                candles += future.result()
+                fetched += 1
+            except Exception as e:
+                # Left incomplete in the manifest; the next run retries it
+                failed += 1
+                logger.error(f"Backfill failed for {symbol_name} {month.strftime('%Y-%m')}: {e}")
+            if (fetched + failed) % 50 == 0:
+                logger.info(f"Backfill progress: {fetched + failed}/{len(tasks)} symbol-months")
+
+    logger.info(
+        f"Backfill finished in {time.perf_counter() - started:.1f}s: {fetched} symbol-months, "
+        f"{candles} candles stored, {failed} failed"
+    )
+    return fetched, candles, failed
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+CANDLE_FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+class CandleFrame:
+    """
+    Lightweight column store for one symbol's candles.
+    Timestamps are int64 epoch nanoseconds of the IST wall-clock time (the same naive
+    values the DataFrame path produces); OHLCV live in one float64 block exposed as
+    per-column views. Convert with to_dataframe() only when pandas is actually needed.
+    """
+
+    def __init__(self, timestamp, values):
+        self.timestamp = timestamp
+        self.values = values
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def from_payload(cls, rows):
+        """
+        Decodes SmartAPI getCandleData rows ([iso_timestamp, open, high, low, close, volume])
+        straight into typed arrays.
+        """
+        rows = rows or []
+        n = len(rows)
+        timestamp = np.empty(n, dtype=np.int64)
+        values = np.empty((n, len(CANDLE_FIELDS)), dtype=np.float64)
+        if n == 0:
+            return cls(timestamp, values)
+
+        # "2024-01-01T09:15:00+05:30" -> drop the offset and keep the IST wall-clock time,
+        # which numpy parses natively without going through dateutil
+        timestamp[:] = np.array([row[0][:19] for row in rows], dtype="datetime64[s]").astype("datetime64[ns]").view(np.int64)
+        values[:] = [row[1:6] for row in rows]
+        return cls(timestamp, values)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Typed arrays of a DataFrame in the usual candle layout (e.g. from CandleArchive.read).
+        """
+        timestamp = df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        return cls(timestamp, df[CANDLE_FIELDS].to_numpy(dtype=np.float64))
+
+    @classmethod
+    def from_candle(cls, candle):
+        """
+        A one-row frame from a candle dict (timestamp plus the OHLCV fields).
+        """
+        timestamp = np.array([np.datetime64(candle["timestamp"], "ns")]).view(np.int64)
+        return cls(timestamp, np.array([[candle[field] for field in CANDLE_FIELDS]], dtype=np.float64))
+
+    def slice(self, start=None, stop=None):
+        return CandleFrame(self.timestamp[start:stop], self.values[start:stop])
+
+    def merge(self, newer):
+        """
+        Candles of both frames in time order with one row per timestamp; where they
+        overlap, 'newer' wins.
+        """
+        if len(newer) == 0:
+            return self
+        timestamp = np.concatenate([self.timestamp, newer.timestamp])
+        values = np.concatenate([self.values, newer.values])
+        # Stable sort keeps 'newer' after 'self' within a timestamp; keep each run's last row
+        order = np.argsort(timestamp, kind="stable")
+        timestamp = timestamp[order]
+        last = np.append(timestamp[1:] != timestamp[:-1], True)
+        return CandleFrame(timestamp[last], values[order][last])
+
+    def last_timestamp(self):
+        return pd.Timestamp(self.timestamp[-1]) if len(self) else None
+
+    @property
+    def open(self):
+        return self.values[:, 0]
+
+    @property
+    def high(self):
+        return self.values[:, 1]
+
+    @property
+    def low(self):
+        return self.values[:, 2]
+
+    @property
+    def close(self):
+        return self.values[:, 3]
+
+    @property
+    def volume(self):
+        return self.values[:, 4]
+
+    def to_dataframe(self):
+        """
+        Returns the frame in the DataFrame layout SmartApiClient.get_5min_candles has always returned.
+        """
+        df = pd.DataFrame(self.values, columns=CANDLE_FIELDS)
+        df.insert(0, "timestamp", self.timestamp.view("datetime64[ns]"))
+        return df
@@ -0,0 +1,158 @@
+import os
+import numpy as np
+from datetime import timedelta
+from utils import get_logger, get_ist_time
+from timeframes import INTERVALS
+from candle_frame import CANDLE_FIELDS, CandleFrame
+
+logger = get_logger(__name__)
+
+CANDLE_INTERVAL = timedelta(minutes=5)
+
+
+def drop_forming_candles(frame, now, interval=CANDLE_INTERVAL):
+    """
+    Removes candles (of a time-ordered CandleFrame) that have not closed yet.
+    A 5-min candle at 09:15 completes at 09:20, so at 09:18 it is still forming.
+    """
+    cutoff = np.datetime64(now - interval, "ns").astype(np.int64)
+    confirmed = frame.slice(stop=np.searchsorted(frame.timestamp, cutoff, side="right"))
+    if len(confirmed) < len(frame):
+        logger.info("Dropping forming candle at %s (Current: %s)", frame.last_timestamp(), now.strftime('%H:%M:%S'))
+    return confirmed
+
+
+class CandleStore:
+    """
+    Keeps confirmed candles (5-minute by default) per symbol between scans.
+    The first fetch for a symbol pulls the full warm-up window; after that only
+    the candles since the last stored timestamp are requested from SmartAPI.
+    Each symbol is persisted as a compressed column-per-array .npz file so a
+    `--once` cron run starts warm. With a CandleArchive of the same interval, a cold
+    symbol warms up from the local archive and only fetches what came after it.
+    Candles are kept and merged as CandleFrame arrays; callers get a DataFrame built once
+    per update.
+    """
+
+    def __init__(self, cache_dir=None, warmup_days=5, max_candles=1000, interval_minutes=5, archive=None):
+        self.cache_dir = cache_dir
+        self.warmup_days = warmup_days
+        self.max_candles = max_candles
+        self.interval = timedelta(minutes=interval_minutes)
+        self.interval_name = INTERVALS[interval_minutes]
+        # Caches for different bar lengths live side by side
+        self.suffix = "" if interval_minutes == 5 else f"_{interval_minutes}m"
+        self.archive = archive if archive is not None and archive.interval == self.interval_name else None
+        self._frames = {}
+        self._dataframes = {}
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, token, exchange):
+        return f"{exchange}_{token}{self.suffix}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, token, exchange="NSE"):
+        """
+        Returns the stored confirmed candles for a symbol, loading them from disk on first use.
+        """
+        key = self._key(token, exchange)
+        self._frame(key)
+        return self._dataframes[key]
+
+    def _frame(self, key):
+        if key not in self._frames:
+            frame = self._load(key)
+            self._frames[key] = frame
+            self._dataframes[key] = None if frame is None else frame.to_dataframe()
+        return self._frames[key]
+
+    def update(self, client, token, exchange="NSE", now=None):
+        """
+        Brings the stored candles for a symbol up to date and returns all confirmed candles.
+        Falls back to a full warm-up fetch when nothing is cached or the cache is older
+        than the warm-up window.
+        """
+        if now is None:
+            now = get_ist_time().replace(tzinfo=None)
+
+        key = self._key(token, exchange)
+        cached = self._frame(key)
+        if (cached is None or len(cached) == 0) and self.archive is not None:
+            archived = self.archive.read(token, exchange, now - timedelta(days=self.warmup_days), now)
+            if archived is not None and len(archived) > 0:
+                logger.info(f"Warming up candle cache for {token} from the local archive ({len(archived)} candles)")
+                self._store(key, drop_forming_candles(CandleFrame.from_dataframe(archived), now, self.interval))
+                cached = self._frames[key]
+
+        last_timestamp = cached.last_timestamp() if cached is not None else None
+
+        if last_timestamp is None or now - last_timestamp > timedelta(days=self.warmup_days):
+            logger.info(f"Warming up candle cache for {token} ({self.warmup_days} days)")
+            frame = client.get_candles(token, exchange, self.interval_name, days=self.warmup_days, as_frame=True)
+            if frame is None:
+                return self._dataframes[key]
+            # Sorted with one row per timestamp, like every stored frame
+            frame = CandleFrame.from_payload([]).merge(frame)
+        else:
+            # Re-request from the last stored candle; the overlapping row is merged away
+            frame = client.get_candles(token, exchange, self.interval_name, from_date=last_timestamp, as_frame=True)
+            if frame is None:
+                return self._dataframes[key]
+            frame = cached.merge(frame)
+
+        return self._store(key, drop_forming_candles(frame, now, self.interval))
+
+    def append(self, token, exchange, candle):
+        """
+        Adds one confirmed candle (e.g. built locally from live ticks) and persists the store.
+        """
+        key = self._key(token, exchange)
+        cached = self._frame(key)
+        frame = CandleFrame.from_candle(candle)
+        return self._store(key, frame if cached is None else cached.merge(frame))
+
+    def _store(self, key, frame):
+        # 'frame' is time-ordered with unique timestamps (see CandleFrame.merge)
+        frame = frame.slice(-self.max_candles)
+        df = frame.to_dataframe()
+
+        self._frames[key] = frame
+        self._dataframes[key] = df
+        self._save(key, frame)
+        return df
+
+    def _load(self, key):
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return None
+
+        try:
+            with np.load(self._path(key)) as data:
+                frame = CandleFrame(
+                    data["timestamp"].astype(np.int64),
+                    np.column_stack([data[col].astype(np.float64) for col in CANDLE_FIELDS]),
+                )
+            logger.info("Loaded %d cached candles for %s", len(frame), key)
+            return frame
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable candle cache for {key}: {e}")
+            return None
+
+    def _save(self, key, frame):
+        if not self.cache_dir:
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            columns = {col: frame.values[:, i] for i, col in enumerate(CANDLE_FIELDS)}
+            columns["timestamp"] = frame.timestamp
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **columns)
+            # Atomic swap so a crashed run never leaves a half-written cache behind
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to persist candle cache for {key}: {e}")
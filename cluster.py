@@ -0,0 +1,158 @@
+import json
+import multiprocessing
+import queue
+import time
+import zlib
+from utils import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+
+def shard_symbols(symbols_map, shards):
+    """
+    Splits SYMBOLS_MAP into 'shards' disjoint maps.
+    Symbols are placed by a stable hash of exchange and token, so a symbol stays on the
+    same worker (and its warm candle cache) across restarts as long as N is unchanged.
+    """
+    result = [{} for _ in range(shards)]
+    for symbol_name, details in symbols_map.items():
+        index = zlib.crc32(f"{details['exchange']}:{details['token']}".encode()) % shards
+        result[index][symbol_name] = details
+    return result
+
+
+def load_credentials(path):
+    """
+    Reads per-worker SmartAPI credentials: a JSON list of objects with
+    api_key, client_id, mpin and totp_secret. Returns [None] (everyone uses Config) if unset.
+    """
+    if not path:
+        return [None]
+    with open(path) as f:
+        credentials = json.load(f)
+    if not credentials:
+        raise ValueError(f"No credentials in {path}")
+    return credentials
+
+
+def worker_loop(index, commands, results, cycle_fn):
+    """
+    Body of a worker process: runs 'cycle_fn' for every cycle number the coordinator sends
+    and reports back with ("done", index, cycle, stats). None on the command queue stops it.
+    """
+    while True:
+        cycle = commands.get()
+        if cycle is None:
+            break
+        started = time.perf_counter()
+        error = None
+        try:
+            cycle_fn()
+        except Exception as e:
+            logger.error(f"Worker {index} failed in cycle {cycle}: {e}")
+            error = str(e)
+        results.put(("done", index, cycle, {"seconds": time.perf_counter() - started, "error": error}))
+
+
+class Coordinator:
+    """
+    Runs the scan across N worker processes, each owning one shard of the symbols and
+    (optionally) its own SmartAPI credentials and quota.
+    Workers send detected alerts back over a multiprocessing queue; the coordinator is the
+    only process that deduplicates and delivers them. Dead workers are restarted before
+    the next cycle.
+    'target(index, symbols_map, credentials, rate, commands, results)' is the worker entry
+    point and must be importable by the spawned processes.
+    """
+
+    def __init__(self, target, symbols_map, workers, credentials=None, rate=3.0):
+        self.target = target
+        self.shards = shard_symbols(symbols_map, workers)
+        self.credentials = credentials or [None]
+        self.rate = rate
+        self.cycle = 0
+        # Fresh interpreters: no inherited threads, sockets or SQLite handles
+        self._context = multiprocessing.get_context("spawn")
+        self.results = self._context.Queue()
+        self.workers = [None] * workers
+        self.commands = [None] * workers
+
+    def _worker_args(self, index):
+        credentials = self.credentials[index % len(self.credentials)]
+        # Workers sharing an API key split its quota between them
+        sharing = sum(1 for i in range(len(self.workers)) if i % len(self.credentials) == index % len(self.credentials))
+        return index, self.shards[index], credentials, self.rate / sharing, self.commands[index], self.results
+
+    def _spawn(self, index):
+        self.commands[index] = self._context.Queue()
+        process = self._context.Process(
+            target=self.target, args=self._worker_args(index), name=f"scan-worker-{index}", daemon=True
+        )
+        process.start()
+        self.workers[index] = process
+        logger.info(f"Started worker {index} (pid {process.pid}) with {len(self.shards[index])} symbols")
+
+    def start(self):
+        for index in range(len(self.workers)):
+            self._spawn(index)
+        return self
+
+    def run_cycle(self, on_alert, timeout=240, on_snapshot=None):
+        """
+        Triggers one scan on every worker and forwards their alerts to
+        'on_alert(alert)' (and snapshot records to 'on_snapshot(records)')
+        until all have finished or 'timeout' seconds pass.
+        Returns {worker index: stats} for the workers that finished.
+        """
+        self.cycle += 1
+        for index, process in enumerate(self.workers):
+            if process is None or not process.is_alive():
+                logger.warning(f"Worker {index} is not running; restarting it")
+                metrics.inc("scan_worker_restarts_total")
+                self._spawn(index)
+            self.commands[index].put(self.cycle)
+
+        finished = {}
+        deadline = time.monotonic() + timeout
+        while len(finished) < len(self.workers):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                message = self.results.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                if any(not process.is_alive() for index, process in enumerate(self.workers) if index not in finished):
+                    logger.error("A worker exited mid-cycle; it will be restarted next cycle")
+                    break
+                continue
+
+            kind, index = message[0], message[1]
+            if kind == "alert":
+                on_alert(message[2])
+            elif kind == "snapshot" and on_snapshot is not None:
+                on_snapshot(message[2])
+            elif kind == "done" and message[2] == self.cycle:
+                finished[index] = message[3]
+
+        missing = [index for index in range(len(self.workers)) if index not in finished]
+        if missing:
+            metrics.inc("scan_worker_timeouts_total", len(missing))
+            logger.warning(f"Cycle {self.cycle}: workers {missing} did not finish in time")
+
+        metrics.set("scan_workers_total", len(self.workers))
+        metrics.set("scan_workers_finished", len(finished))
+        if finished:
+            metrics.set("scan_worker_cycle_seconds_max", round(max(stats["seconds"] for stats in finished.values()), 6))
+        return finished
+
+    def close(self, timeout=10):
+        for index, process in enumerate(self.workers):
+            if process is not None and process.is_alive():
+                self.commands[index].put(None)
+        for process in self.workers:
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
@@ -12,8 +12,89 @@ class Config:
     SMARTAPI_MPIN = os.getenv("SMARTAPI_MPIN")
     SMARTAPI_TOTP_SECRET = os.getenv("SMARTAPI_TOTP_SECRET")
     
+    # SmartAPI base URL override, e.g. a local stub (see smartapi_stub.py) for offline runs
+    SMARTAPI_ROOT_URL = os.getenv("SMARTAPI_ROOT_URL")
+
+    # Cached SmartAPI session tokens, shared by every worker and cron run
+    SESSION_CACHE_PATH = os.getenv("SESSION_CACHE_PATH", os.path.join(basedir, "cache", "session.json"))
+    
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
     TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+    # Point at a local stub (see telegram_stub.py) to test alert delivery offline
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+
+    # Local candle cache (one .npz file per symbol) so cron runs start warm
+    CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR", os.path.join(basedir, "cache", "candles"))
+
+    # Backfilled history (per symbol/month .npy partitions) for backtests and cache warm-ups
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(basedir, "cache", "archive"))
+
+    # Sent-alert dedup store (SQLite, WAL mode) and how long entries are kept
+    ALERT_DB_PATH = os.getenv("ALERT_DB_PATH", os.path.join(basedir, "cache", "alerts.sqlite3"))
+    ALERT_TTL_DAYS = float(os.getenv("ALERT_TTL_DAYS", "3"))
+
+    # Chart timeframes in minutes, e.g. "5,15,60" (several are resampled from one 1-minute fetch)
+    TIMEFRAMES = os.getenv("TIMEFRAMES", "5")
+
+    # Bars per symbol/timeframe kept in the cross-sectional scan matrix, and an optional
+    # shared-memory name that publishes it to other processes (workers append -<index>)
+    MATRIX_WINDOW = int(os.getenv("MATRIX_WINDOW", "128"))
+    MATRIX_SHM_NAME = os.getenv("MATRIX_SHM_NAME", "")
+
+    # Adaptive polling: fetch each symbol at least every POLL_MAX_BARS bars and sooner when
+    # a crossover is reachable, assuming closes move at most POLL_VOLATILITY_FACTOR x the
+    # largest bar-to-bar move of the last POLL_VOLATILITY_BARS bars (1 = poll every candle)
+    POLL_MAX_BARS = int(os.getenv("POLL_MAX_BARS", "1"))
+    POLL_VOLATILITY_FACTOR = float(os.getenv("POLL_VOLATILITY_FACTOR", "2.0"))
+    POLL_VOLATILITY_BARS = int(os.getenv("POLL_VOLATILITY_BARS", "20"))
+
+    # Extra strategy rules (names from strategies.STRATEGY_REGISTRY), e.g. "rsi14,volume_spike"
+    STRATEGIES = os.getenv("STRATEGIES", "")
+
+    # End-of-cycle signal ranking: alert on at most the N best signals (0 = all) that reach
+    # the minimum confirmation score (0..1) and volume vs. 20-bar average
+    ALERT_TOP_N = int(os.getenv("ALERT_TOP_N", "0"))
+    ALERT_MIN_SCORE = float(os.getenv("ALERT_MIN_SCORE", "0"))
+    ALERT_MIN_VOLUME_RATIO = float(os.getenv("ALERT_MIN_VOLUME_RATIO", "0"))
+
+    # Angel One instrument master, parsed once per day into an array-backed index
+    INSTRUMENT_CACHE_DIR = os.getenv("INSTRUMENT_CACHE_DIR", os.path.join(basedir, "cache", "instruments"))
+    # Optional comma-separated watchlist of EXCHANGE:TRADINGSYMBOL (e.g. "NSE:SBIN-EQ,NSE:INFY-EQ")
+    WATCHLIST = os.getenv("WATCHLIST")
+
+    # Local Prometheus-style metrics endpoint (0 disables) and optional per-cycle cProfile dumps
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+    # Local read-only snapshot API (latest candle, MA9/MA20 and last signal per symbol),
+    # on 127.0.0.1:SNAPSHOT_PORT and/or a Unix socket; both empty disables it
+    SNAPSHOT_PORT = int(os.getenv("SNAPSHOT_PORT", "0"))
+    SNAPSHOT_SOCKET = os.getenv("SNAPSHOT_SOCKET", "")
+
+    # NSE holiday list (one YYYY-MM-DD per line) and the delay after each candle close
+    # before scanning, giving SmartAPI time to publish the completed bar
+    HOLIDAYS_FILE = os.getenv("HOLIDAYS_FILE", os.path.join(basedir, "nse_holidays.txt"))
+    SCHEDULER_SETTLE_SECONDS = float(os.getenv("SCHEDULER_SETTLE_SECONDS", "2"))
+
+    # SmartAPI historical data quota (requests/second) and concurrent fetch workers
+    SMARTAPI_HIST_RATE_LIMIT = float(os.getenv("SMARTAPI_HIST_RATE_LIMIT", "3"))
+    SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "8"))
+
+    # Sharded mode: worker processes that split SYMBOLS_MAP (0 = single process), optionally
+    # each with its own account from a JSON list of {api_key, client_id, mpin, totp_secret}
+    SCAN_PROCESSES = int(os.getenv("SCAN_PROCESSES", "0"))
+    WORKER_CREDENTIALS_FILE = os.getenv("WORKER_CREDENTIALS_FILE")
+    # How long the coordinator waits for all workers to finish a cycle
+    SCAN_PROCESS_TIMEOUT = float(os.getenv("SCAN_PROCESS_TIMEOUT", "240"))
+
+    # Logging: root level, per-module overrides (e.g. "smartapi_client=DEBUG,telegram_alerts=WARNING"),
+    # "json" or "text" records in app.log, and rotation by size or by time (e.g. "midnight")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN")
 
     @classmethod
     def validate(cls):
@@ -1,3 +1,6 @@
+import math
+from collections import deque
+import numpy as np
 import pandas as pd
 
 def calculate_sma(series, period):
@@ -6,6 +9,21 @@ def calculate_sma(series, period):
     """
     return series.rolling(window=period).mean()
 
+def calculate_ema(series, period):
+    """
+    Calculates Exponential Moving Average (EMA).
+    """
+    return series.ewm(span=period, adjust=False).mean()
+
+def calculate_rsi(series, period=14):
+    """
+    Calculates Relative Strength Index (RSI) with Wilder's smoothing.
+    """
+    delta = series.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    return 100 - 100 / (1 + gain / loss)
+
 def detect_bullish_crossover(ma9_prev, ma20_prev, ma9_curr, ma20_curr):
     """
     Detects if MA9 crossed above MA20.
@@ -25,3 +43,111 @@ def detect_bearish_crossover(ma9_prev, ma20_prev, ma9_curr, ma20_curr):
         return False
         
     return (ma9_prev >= ma20_prev) and (ma9_curr < ma20_curr)
+
+def detect_crossovers(ma9, ma20):
+    """
+    Vectorized form of detect_bullish_crossover / detect_bearish_crossover over whole MA arrays.
+    Returns (bullish, bearish) boolean arrays; element i compares candle i with candle i-1.
+    NaN comparisons are False, so warm-up rows never signal.
+    """
+    ma9 = np.asarray(ma9, dtype=np.float64)
+    ma20 = np.asarray(ma20, dtype=np.float64)
+
+    bullish = np.zeros(len(ma9), dtype=bool)
+    bearish = np.zeros(len(ma9), dtype=bool)
+    bullish[1:] = (ma9[:-1] <= ma20[:-1]) & (ma9[1:] > ma20[1:])
+    bearish[1:] = (ma9[:-1] >= ma20[:-1]) & (ma9[1:] < ma20[1:])
+    return bullish, bearish
+
+
+class RollingMean:
+    """
+    Streaming equivalent of `series.rolling(window=period).mean()`.
+    Keeps a ring buffer of the last 'period' values and a running sum, using the same
+    Kahan-compensated add/remove steps as pandas so the output matches it exactly.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.sum = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.neg_count = 0
+        self.same_count = 0
+        self.prev_value = None
+
+    def update(self, value):
+        """
+        Adds one value and returns the current mean (NaN until the window is full).
+        """
+        value = float(value)
+
+        if len(self.window) == self.period:
+            old = self.window.popleft()
+            y = -old - self.compensation_remove
+            t = self.sum + y
+            self.compensation_remove = t - self.sum - y
+            self.sum = t
+            if math.copysign(1.0, old) < 0:
+                self.neg_count -= 1
+
+        self.window.append(value)
+        y = value - self.compensation_add
+        t = self.sum + y
+        self.compensation_add = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_count += 1
+
+        # pandas returns the repeated value itself for a constant window (GH#42064)
+        if value == self.prev_value:
+            self.same_count += 1
+        else:
+            self.same_count = 1
+        self.prev_value = value
+
+        nobs = len(self.window)
+        if nobs < self.period:
+            return math.nan
+
+        result = self.sum / nobs
+        if self.same_count >= nobs:
+            result = self.prev_value
+        elif self.neg_count == 0 and result < 0:
+            result = 0.0
+        elif self.neg_count == nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class CrossoverState:
+    """
+    Incremental MA9/MA20 crossover detector for one symbol.
+    Takes one confirmed candle at a time in constant time and memory.
+    """
+
+    def __init__(self, fast_period=9, slow_period=20):
+        self.fast = RollingMean(fast_period)
+        self.slow = RollingMean(slow_period)
+        self.ma_fast = math.nan
+        self.ma_slow = math.nan
+        self.last_timestamp = None
+
+    def update(self, close, timestamp=None):
+        """
+        Feeds one confirmed candle close.
+        Returns (ma_fast, ma_slow, signal) where signal is "BULLISH", "BEARISH" or None.
+        """
+        ma_fast_prev, ma_slow_prev = self.ma_fast, self.ma_slow
+        self.ma_fast = self.fast.update(close)
+        self.ma_slow = self.slow.update(close)
+        self.last_timestamp = timestamp
+
+        signal = None
+        if detect_bullish_crossover(ma_fast_prev, ma_slow_prev, self.ma_fast, self.ma_slow):
+            signal = "BULLISH"
+        elif detect_bearish_crossover(ma_fast_prev, ma_slow_prev, self.ma_fast, self.ma_slow):
+            signal = "BEARISH"
+
+        return self.ma_fast, self.ma_slow, signal
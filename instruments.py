@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import numpy as np
+import requests
+from utils import get_logger, get_ist_time
+
+logger = get_logger(__name__)
+
+INSTRUMENT_MASTER_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+
+FIELDS = ["token", "symbol", "name", "exch_seg", "instrumenttype", "expiry", "lotsize", "tick_size"]
+
+
+class InstrumentMaster:
+    """
+    Array-backed index over Angel One's instrument master.
+    The JSON file is parsed once per day and cached as one .npy file per column plus
+    two sorted key arrays. Later loads memory-map those files, so startup cost doesn't
+    grow with the size of the master, and lookups are binary searches.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.exchange_symbol_keys = columns["exchange_symbol_keys"]
+        self.exchange_symbol_order = columns["exchange_symbol_order"]
+        self.exchange_token_keys = columns["exchange_token_keys"]
+        self.exchange_token_order = columns["exchange_token_order"]
+
+    def __len__(self):
+        return len(self.columns["token"])
+
+    @classmethod
+    def load(cls, cache_dir, date=None, source=INSTRUMENT_MASTER_URL):
+        """
+        Returns the instrument index for 'date' (default: today in IST), building and caching
+        it from 'source' (URL or local JSON path) if no cached copy exists yet.
+        """
+        date = date or get_ist_time().strftime("%Y-%m-%d")
+        path = os.path.join(cache_dir, date)
+
+        if not os.path.isdir(path):
+            cls._build(cls._read_source(source), path)
+            cls._prune(cache_dir, keep=date)
+
+        columns = {
+            name[:-4]: np.load(os.path.join(path, name), mmap_mode="r")
+            for name in os.listdir(path) if name.endswith(".npy")
+        }
+        return cls(columns)
+
+    @staticmethod
+    def _read_source(source):
+        logger.info(f"Parsing instrument master from {source}...")
+        if source.startswith("http"):
+            response = requests.get(source, timeout=60)
+            response.raise_for_status()
+            return response.json()
+        with open(source) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _build(records, path):
+        columns = {field: np.array([str(r.get(field, "")) for r in records]) for field in FIELDS}
+
+        exchange_symbol = np.array([f"{e}:{s}" for e, s in zip(columns["exch_seg"], columns["symbol"])])
+        exchange_token = np.array([f"{e}:{t}" for e, t in zip(columns["exch_seg"], columns["token"])])
+        for name, keys in (("exchange_symbol", exchange_symbol), ("exchange_token", exchange_token)):
+            order = np.argsort(keys, kind="stable")
+            columns[f"{name}_keys"] = keys[order]
+            columns[f"{name}_order"] = order
+
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+        os.replace(tmp_path, path)
+        logger.info(f"Cached {len(records)} instruments to {path}")
+
+    @staticmethod
+    def _prune(cache_dir, keep):
+        for name in os.listdir(cache_dir):
+            if name != keep and not name.endswith(".tmp"):
+                shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+    def _row(self, i):
+        return {field: str(self.columns[field][i]) for field in FIELDS}
+
+    def _search(self, keys, order, key):
+        lo = np.searchsorted(keys, key, side="left")
+        hi = np.searchsorted(keys, key, side="right")
+        return [int(i) for i in order[lo:hi]]
+
+    def by_symbol(self, exchange, symbol):
+        """
+        Looks up an instrument by exchange segment and trading symbol (e.g. "NSE", "SBIN-EQ").
+        """
+        rows = self._search(self.exchange_symbol_keys, self.exchange_symbol_order, f"{exchange}:{symbol}")
+        return self._row(rows[0]) if rows else None
+
+    def by_token(self, exchange, token):
+        """
+        Looks up an instrument by exchange segment and SmartAPI symbol token.
+        """
+        rows = self._search(self.exchange_token_keys, self.exchange_token_order, f"{exchange}:{token}")
+        return self._row(rows[0]) if rows else None
+
+    def segment(self, exchange, instrumenttype=None):
+        """
+        Returns every instrument on an exchange segment, optionally filtered by instrument type.
+        """
+        prefix = f"{exchange}:"
+        lo = np.searchsorted(self.exchange_symbol_keys, prefix, side="left")
+        hi = np.searchsorted(self.exchange_symbol_keys, f"{exchange};", side="left")
+        rows = [self._row(int(i)) for i in self.exchange_symbol_order[lo:hi]]
+        if instrumenttype is not None:
+            rows = [r for r in rows if r["instrumenttype"] == instrumenttype]
+        return rows
+
+    def symbols_map(self, names):
+        """
+        Resolves "EXCHANGE:TRADINGSYMBOL" names into a SYMBOLS_MAP-style dict.
+        Unknown names are logged and skipped.
+        """
+        resolved = {}
+        for name in names:
+            exchange, _, symbol = name.strip().partition(":")
+            row = self.by_symbol(exchange, symbol)
+            if row is None:
+                logger.warning(f"Instrument not found: {name}")
+                continue
+            resolved[name.strip()] = {"token": row["token"], "exchange": row["exch_seg"]}
+        return resolved
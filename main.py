@@ -1,14 +1,47 @@
+import sys
 import time
-import schedule
-import pandas as pd
-from smartapi_client import SmartApiClient
-from indicators import calculate_sma, detect_bullish_crossover, detect_bearish_crossover
-from telegram_alerts import send_telegram_message
+from market_calendar import MarketCalendar, CandleScheduler, CANDLE_INTERVAL
 from utils import get_logger, format_ist_time, get_ist_time
 from config import Config
 
 logger = get_logger(__name__)
 
+# NSE trading days (weekends and the local holiday list are skipped)
+market_calendar = MarketCalendar.from_file(Config.HOLIDAYS_FILE)
+
+def is_market_open():
+    """
+    Checks if current IST time is within trading hours (09:15 to 15:30) on an NSE trading day.
+    The settle delay is allowed after 15:30 so the candle-close run for the last bar still scans.
+    """
+    # Use IST time instead of server time (UTC on PythonAnywhere)
+    return market_calendar.is_open(get_ist_time(), grace_seconds=Config.SCHEDULER_SETTLE_SECONDS + 60)
+
+# Cron fast path: most `--once` invocations land outside market hours. Decide that from
+# the calendar alone and exit before pandas, SmartApi (which makes a network call on
+# import) and the stores are loaded, and before any session is restored or created.
+if __name__ == "__main__" and "--once" in sys.argv[1:] and not is_market_open():
+    logger.info("Market is closed. Skipping scan.")
+    sys.exit(0)
+
+import numpy as np
+import pandas as pd
+from smartapi_client import SmartApiClient
+from candle_store import CandleStore
+from alert_store import AlertStore
+from rate_limiter import RateLimiter
+from scanner import ScanEngine
+from candle_archive import CandleArchive
+from strategies import build_engine
+from signal_ranking import Candidate, rank_signals, signal_window
+from metrics import metrics, profile_cycle, start_metrics_server
+from timeframes import INTERVALS, TimeframeResampler, parse_timeframes, base_interval
+from indicators import calculate_sma, detect_bullish_crossover, detect_bearish_crossover, CrossoverState
+from telegram_alerts import send_telegram_message, AlertDispatcher
+from universe_matrix import UniverseMatrix
+from poll_scheduler import PollScheduler
+from snapshot_service import SnapshotStore, start_snapshot_server
+
 # Configuration
 # NOTE: You need to map symbols to their SmartAPI tokens.
 # Example tokens (Need to be updated with actual tokens from Angel One instrument list)
@@ -16,141 +49,415 @@ SYMBOLS_MAP = {
     "NSE:NIFTY": {"token": "99926000", "exchange": "NSE"}
 }
 
-# State to track alerts to avoid duplicates
-# Format: { "SYMBOL": "LAST_ALERT_TIME_OR_STATUS" }
-last_alert_status = {}
+# Durable record of sent alerts to avoid duplicates across runs and restarts
+# Keyed by (symbol, direction, candle timestamp)
+alert_store = AlertStore(Config.ALERT_DB_PATH, ttl_days=Config.ALERT_TTL_DAYS)
+# Trading day the store was last compacted on (opening it compacts too)
+alert_store_day = get_ist_time().date()
 
-from datetime import datetime, time as dtime
+# Incremental MA9/MA20 state per symbol, fed one confirmed candle at a time (streaming mode)
+crossover_states = {}
 
-def is_market_open():
+# Polling scans keep every symbol/timeframe's recent closes in one symbols x bars matrix
+# and detect MA9/MA20 crossovers for all of them in a single vectorized pass.
+# With a name (Config.MATRIX_SHM_NAME) it lives in shared memory for other processes.
+universe = None
+universe_name = Config.MATRIX_SHM_NAME or None
+
+# Adaptive polling: symbols whose MA9/MA20 can't cross soon are fetched less often
+# (at least every Config.POLL_MAX_BARS bars; 1 polls every symbol on every candle)
+poll_scheduler = None
+if Config.POLL_MAX_BARS > 1:
+    poll_scheduler = PollScheduler(
+        min(Config.POLL_MAX_BARS, Config.MATRIX_WINDOW - 20),
+        volatility_factor=Config.POLL_VOLATILITY_FACTOR,
+        volatility_bars=Config.POLL_VOLATILITY_BARS,
+    )
+
+# Extra registered strategy rules run alongside the built-in streaming MA9/MA20 check
+strategy_names = [name.strip() for name in Config.STRATEGIES.split(",")]
+strategy_engine = build_engine(name for name in strategy_names if name and name != "ma9_ma20")
+
+# On a fresh state, alert only on crossovers within the last few confirmed candles
+scan_depth = 3
+
+# Background Telegram delivery; alerts from the same candle are merged into one digest
+alert_dispatcher = AlertDispatcher()
+
+# Set in sharded worker processes: signals go to the coordinator instead of Telegram
+alert_forward = None
+
+# Read-only view of the latest candles, MAs and signals for local consumers, published
+# after every job() cycle (served when Config.SNAPSHOT_PORT/SNAPSHOT_SOCKET is set)
+snapshot_store = SnapshotStore() if Config.SNAPSHOT_PORT or Config.SNAPSHOT_SOCKET else None
+# Records scanned during the current cycle, and the last signal seen per label
+snapshot_updates = {}
+last_signals = {}
+# Set in sharded worker processes: snapshot records go to the coordinator
+snapshot_forward = None
+
+# Chart timeframes to scan (minutes). With more than one, 1-minute candles are fetched
+# once per symbol and every timeframe is resampled from them in memory.
+timeframes = parse_timeframes(Config.TIMEFRAMES)
+base_minutes = base_interval(timeframes)
+resamplers = {tf: TimeframeResampler(tf) for tf in timeframes if tf != base_minutes}
+
+# Confirmed candles kept between runs; only new candles are fetched after warm-up
+# (cold symbols warm up from the backfilled archive when it has them)
+candle_store = CandleStore(
+    Config.CANDLE_CACHE_DIR,
+    interval_minutes=base_minutes,
+    max_candles=1000 if base_minutes >= 5 else 2500,
+    archive=CandleArchive(Config.ARCHIVE_DIR, INTERVALS[base_minutes]),
+)
+
+from datetime import datetime, timedelta
+
+def alert_direction(signal, rule_name=None):
+    # Dedup key: built-in crossovers keep the bare direction used by older alert history
+    return signal if rule_name is None else f"{rule_name}:{signal}"
+
+def send_crossover_alert(symbol_name, signal, close_price, timestamp, rule=None, interval=CANDLE_INTERVAL, candidate=None):
     """
-    Checks if current IST time is between 09:15 and 15:30.
+    Sends the Telegram alert for a confirmed crossover unless it was already sent.
+    'rule' is a registered strategy rule; None means the built-in MA9/MA20 crossover.
+    'interval' is the bar length of the candle at 'timestamp'.
+    'candidate' is the ranked signal; its confirmation score is included in the message.
     """
-    # Use IST time instead of server time (UTC on PythonAnywhere)
-    now_ist = get_ist_time()
-    current_time = now_ist.time()
-    start_time = dtime(9, 15)
-    end_time = dtime(15, 30)
+    direction = alert_direction(signal, None if rule is None else rule.name)
+    if not alert_store.claim(symbol_name, direction, timestamp):
+        logger.info(f"Duplicate alert suppressed for {symbol_name} at {timestamp}")
+        return
+
+    if rule is not None:
+        emoji = "🚀" if signal == "BULLISH" else "🔴"
+        signal_text = f"**{signal} SIGNAL: {rule.name}**"
+        desc = rule.describe(signal)
+    elif signal == "BULLISH":
+        emoji = "🚀"
+        signal_text = "**BULLISH CROSSOVER CONFIRMED**"
+        desc = "Signal: MA9 crossed ABOVE MA20"
+    else:
+        emoji = "🔴"
+        signal_text = "**BEARISH CROSSOVER CONFIRMED**"
+        desc = "Signal: MA9 crossed BELOW MA20"
+        
+    message = (
+        f"{emoji} {signal_text}\n\n"
+        f"Symbol: {symbol_name}\n"
+        f"{desc}\n"
+        f"Price: {close_price}\n"
+        f"Time: {timestamp} (Candle Close)\n"
+    )
+    if candidate is not None and candidate.score is not None:
+        message += (
+            f"Confirmation: {candidate.score:.2f} (volume {candidate.features['volume_ratio']:.1f}x avg, "
+            f"MA9 slope {candidate.features['ma_slope_pct']:+.3f}%/bar)\n"
+        )
     
-    # Check if it's a weekday (Monday=0, Sunday=6)
-    is_weekday = now_ist.weekday() < 5
+    def delivered(ok):
+        if ok:
+            alert_store.confirm(symbol_name, direction, timestamp)
+        else:
+            # Not sent (retries exhausted or still queued at shutdown): release the claim so
+            # a later detection (e.g. a --once rerun) is not suppressed as a duplicate
+            alert_store.release(symbol_name, direction, timestamp)
+            metrics.inc("alerts_undelivered_total")
+            logger.warning(f"Alert for {symbol_name} at {timestamp} was not delivered; claim released")
+
+    with metrics.timer("alert"):
+        queued = alert_dispatcher.submit(message, group=timestamp, candle_close=timestamp + interval, on_done=delivered)
+    if not queued:
+        alert_store.release(symbol_name, direction, timestamp)
+        metrics.inc("alerts_unqueued_total")
+        logger.warning(f"Alert for {symbol_name} at {timestamp} dropped: alert queue full")
+        return
+    metrics.inc("alerts_total")
+    logger.info(f"Alert queued for {symbol_name} at {timestamp}")
+
+def make_candidate(label, signal, df, i, rule=None, interval=CANDLE_INTERVAL):
+    """
+    Captures a signal on row 'i' of 'df' for the end-of-cycle ranking.
+    """
+    closes, volumes = signal_window(df, i)
+    return Candidate(
+        label, signal, df['close'].iloc[i], df['timestamp'].iloc[i],
+        None if rule is None else rule.name, interval, closes, volumes,
+    )
+
+def dispatch_signals(candidates):
+    """
+    Ranks all signals detected in one cycle together and alerts on the best of them
+    (Config.ALERT_TOP_N, ALERT_MIN_SCORE, ALERT_MIN_VOLUME_RATIO).
+    Sharded workers forward them to the coordinator, which ranks across all shards.
+    """
+    if alert_forward is not None:
+        for candidate in candidates:
+            alert_forward(candidate)
+        return
+    if not candidates:
+        return
+
+    # Signals that were already sent must not take a top-N slot
+    fresh = [c for c in candidates if not alert_store.seen(c.symbol_name, alert_direction(c.signal, c.rule_name), c.timestamp)]
+    with metrics.timer("rank"):
+        selected, rejected = rank_signals(
+            fresh, top_n=Config.ALERT_TOP_N, min_score=Config.ALERT_MIN_SCORE,
+            min_volume_ratio=Config.ALERT_MIN_VOLUME_RATIO,
+        )
+    if rejected:
+        metrics.inc("alerts_filtered_total", len(rejected))
+        logger.info(f"Signal ranking kept {len(selected)} of {len(fresh)} new signals this cycle")
+
+    rules = {rule.name: rule for rule in strategy_engine.rules}
+    for c in selected:
+        send_crossover_alert(
+            c.symbol_name, c.signal, c.close_price, c.timestamp,
+            rule=rules.get(c.rule_name), interval=c.interval, candidate=c,
+        )
+
+def job(client, scan_fn=None):
+    """
+    One scheduled scan cycle, optionally profiled with cProfile (Config.PROFILE_DIR).
+    'scan_fn' replaces scan(), e.g. scan_sharded with a Coordinator as 'client'.
+    """
+    global alert_store_day
+    with profile_cycle(Config.PROFILE_DIR):
+        started = time.perf_counter()
+        today = get_ist_time().date()
+        if today != alert_store_day:
+            # Long-running processes drop expired alerts once a day, not just on startup
+            alert_store.compact()
+            alert_store_day = today
+        (scan_fn or scan)(client)
+        if snapshot_store is not None:
+            snapshot_store.publish(snapshot_updates, labels=universe_labels())
+            snapshot_updates.clear()
+        metrics.inc("scan_cycles_total")
+        metrics.set("scan_cycle_seconds", round(time.perf_counter() - started, 6))
+
+def timeframe_label(symbol_name, tf):
+    """
+    Alert/state label for a symbol on one timeframe. The 5-minute chart keeps the plain
+    symbol name so existing alert history still applies.
+    """
+    return symbol_name if tf == 5 else f"{symbol_name} [{tf}m]"
+
+def timeframe_bars(symbol_name, df, now):
+    """
+    Yields (label, confirmed bars, bar length) for each configured timeframe of a symbol.
+    'df' holds the fetched base candles; higher timeframes are resampled from it incrementally.
+    """
+    for tf in timeframes:
+        label = timeframe_label(symbol_name, tf)
+        bars = df if tf == base_minutes else resamplers[tf].update(symbol_name, df, now)
+        yield label, bars, pd.Timedelta(minutes=tf)
+
+def scan_candles(label, df, interval=CANDLE_INTERVAL):
+    """
+    Runs the MA9/MA20 crossover and the registered strategy rules over the confirmed
+    candles of one symbol/timeframe. Returns the signals on candles not scanned before,
+    as candidates for dispatch_signals().
+    """
+    # Feed only candles the indicator state hasn't seen yet
+    state = crossover_states.get(label)
+    if state is None:
+        # Fresh state (startup / --once run): replay the full history to warm the
+        # moving averages, but only alert on the last few candles to be safe
+        # against missed runs.
+        state = CrossoverState(9, 20)
+        crossover_states[label] = state
+        alert_from = df['timestamp'].iloc[max(1, len(df) - scan_depth)]
+        new_candles = df
+    else:
+        alert_from = None
+        new_candles = df[df['timestamp'] > state.last_timestamp]
+    
+    logger.info("Scanning %d new confirmed candles for %s...", len(new_candles), label)
+
+    # Update MA9/MA20 and scan for Crossover, one candle at a time
+    crossovers = []
+    first_new = len(df) - len(new_candles)
+    with metrics.timer("indicator"):
+        for j, (timestamp, close_price) in enumerate(zip(new_candles['timestamp'], new_candles['close'])):
+            ma9, ma20, signal = state.update(close_price, timestamp)
+            
+            if signal is None or (alert_from is not None and timestamp < alert_from):
+                continue
+            
+            crossovers.append((signal, first_new + j))
     
-    return is_weekday and start_time <= current_time <= end_time
+    candidates = [make_candidate(label, signal, df, i, interval=interval) for signal, i in crossovers]
+
+    if len(new_candles) > 0:
+        alert_start = len(df) - len(new_candles)
+        if alert_from is not None:
+            alert_start = max(1, len(df) - scan_depth)
+        candidates += scan_rules(label, df, alert_start, interval)
+
+    return candidates
+
+def scan_rules(label, df, alert_start, interval=CANDLE_INTERVAL):
+    """
+    Evaluates the extra registered rules over one symbol/timeframe's candles in one
+    vectorized pass. Returns candidates for signals on rows from 'alert_start' on.
+    """
+    candidates = []
+    if not strategy_engine.rules:
+        return candidates
+
+    with metrics.timer("detect"):
+        rule_signals = strategy_engine.evaluate(df)
+    for rule in strategy_engine.rules:
+        bullish, bearish = rule_signals[rule.name]
+        for i in np.flatnonzero(bullish[alert_start:] | bearish[alert_start:]) + alert_start:
+            signal = "BULLISH" if bullish[i] else "BEARISH"
+            candidates.append(make_candidate(label, signal, df, i, rule=rule, interval=interval))
+    return candidates
+
+def universe_labels():
+    return [timeframe_label(symbol_name, tf) for symbol_name in SYMBOLS_MAP for tf in timeframes]
+
+def universe_matrix():
+    """
+    Returns the scan matrix for the current SYMBOLS_MAP and timeframes, (re)building it
+    when the watchlist changed. A rebuilt matrix warms up like a fresh start.
+    """
+    global universe
+    labels = universe_labels()
+    if universe is None or universe.labels != labels:
+        if universe is not None:
+            universe.close()
+        universe = UniverseMatrix(labels, window=Config.MATRIX_WINDOW, name=universe_name)
+        logger.info(f"Scan matrix: {len(labels)} rows x {Config.MATRIX_WINDOW} bars")
+    return universe
+
+def scan_universe(matrix, scanned):
+    """
+    MA9/MA20 crossovers for every row appended this cycle in one pass over the matrix,
+    plus the registered rules per row. 'scanned' maps labels to (confirmed bars, bar length).
+    Returns candidates for dispatch_signals().
+    """
+    with metrics.timer("indicator"):
+        bullish, bearish, alert_bars = matrix.crossovers(scan_depth)
+    depth = bullish.shape[1]
+
+    candidates = []
+    for row, j in zip(*np.nonzero(bullish | bearish)):
+        label = matrix.labels[row]
+        bars, interval = scanned[label]
+        signal = "BULLISH" if bullish[row, j] else "BEARISH"
+        candidates.append(make_candidate(label, signal, bars, len(bars) - depth + j, interval=interval))
+
+    for label, (bars, interval) in scanned.items():
+        new = alert_bars[matrix.index[label]]
+        if new:
+            candidates += scan_rules(label, bars, len(bars) - new, interval)
+
+    matrix.mark_scanned()
+    return candidates
+
+def json_number(value):
+    return float(value) if np.isfinite(value) else None
+
+def snapshot_records(matrix, scanned, candidates):
+    """
+    Snapshot records for the symbol/timeframes scanned this cycle: latest confirmed
+    candle, MA9/MA20, their spread and the last signal detected.
+    """
+    for c in candidates:
+        last = last_signals.get(c.symbol_name)
+        if last is None or str(c.timestamp) >= last["timestamp"]:
+            last_signals[c.symbol_name] = {
+                "signal": c.signal, "rule": c.rule_name, "timestamp": str(c.timestamp), "close": float(c.close_price),
+            }
+
+    ma9, ma20 = matrix.moving_averages()
+    records = {}
+    for symbol_name in SYMBOLS_MAP:
+        for tf in timeframes:
+            label = timeframe_label(symbol_name, tf)
+            if label not in scanned:
+                continue
+            row = matrix.index[label]
+            candle = scanned[label][0].iloc[-1]
+            spread = ma9[row] - ma20[row]
+            records[label] = {
+                "symbol": symbol_name,
+                "timeframe": tf,
+                "candle": {
+                    "timestamp": str(candle["timestamp"]),
+                    **{col: float(candle[col]) for col in ["open", "high", "low", "close", "volume"]},
+                },
+                "ma9": json_number(ma9[row]),
+                "ma20": json_number(ma20[row]),
+                "spread": json_number(round(spread, 8)),
+                "spread_pct": json_number(round(spread / candle["close"] * 100, 6)),
+                "last_signal": last_signals.get(label),
+            }
+    return records
+
+def schedule_polls(matrix, scanned):
+    """
+    Sets the next poll of every symbol scanned this cycle from its rows in the matrix.
+    Symbols whose fetch failed keep their old (past) slot and are retried next cycle.
+    """
+    names = [s for s in SYMBOLS_MAP if any(timeframe_label(s, tf) in scanned for tf in timeframes)]
+    if not names:
+        return
+    rows = np.array([[matrix.index[timeframe_label(s, tf)] for tf in timeframes] for s in names])
+    depth = max(20, Config.POLL_VOLATILITY_BARS + 1)
+    poll_scheduler.update(
+        names, matrix.closes[:, -depth:][rows], matrix.timestamps[:, -1][rows].view("datetime64[ns]"), timeframes,
+    )
 
-def job(client):
+def scan(client):
     if not is_market_open():
         logger.info("Market is closed. Skipping scan.")
         return
 
     logger.info("Starting scheduled scan for Confirmed Crossovers...")
     
-    for symbol_name, details in SYMBOLS_MAP.items():
+    engine = ScanEngine(client, candle_store, max_workers=Config.SCAN_WORKERS)
+    matrix = universe_matrix()
+    scanned = {}
+
+    symbols = SYMBOLS_MAP
+    if poll_scheduler is not None:
+        symbols = poll_scheduler.due(SYMBOLS_MAP, get_ist_time().replace(tzinfo=None))
+    
+    for symbol_name, fetch in engine.fetch_all(symbols):
         try:
-            token = details["token"]
-            exchange = details["exchange"]
-            
-            logger.info(f"Processing {symbol_name}...")
+            logger.info("Processing %s...", symbol_name)
             
-            # 1. Fetch Data
-            df = client.get_5min_candles(token, exchange)
+            # 1. Fetch Data (concurrent, incremental after warm-up)
+            # The store only keeps COMPLETED candles: a 5-min candle at 09:15 completes
+            # at 09:20, so at 09:18 it is forming and gets dropped.
+            df = fetch.result()
             
-            if df is None or len(df) < 20:
+            if df is None or len(df) == 0:
                 logger.warning(f"Insufficient data for {symbol_name}")
                 continue
-            
-            # 2. Filter out Forming Candle
-            # We want to ensure we only process COMPLETED candles.
-            # A 5-min candle at 09:15 completes at 09:20.
-            # If current time is 09:18, the 09:15 candle is forming -> Drop it.
-            # If current time is 09:21, the 09:15 candle is confirmed -> Keep it.
-            
-            from datetime import timedelta
-            # Use IST time to match the timezone of candle timestamps from SmartAPI
-            current_time = get_ist_time().replace(tzinfo=None)
-            
-            # Check the last candle
-            last_candle = df.iloc[-1]
-            last_candle_time = last_candle['timestamp']
-            
-            # Theoretically, close time is timestamp + 5 mins
-            candle_close_time = last_candle_time + timedelta(minutes=5)
-            
-            if current_time < candle_close_time:
-                logger.info(f"Dropping forming candle at {last_candle_time} (Current: {current_time.strftime('%H:%M:%S')})")
-                df = df.iloc[:-1] # Remove the last row
-            
-            if len(df) < 20: 
-                logger.warning("Insufficient data after filtering forming candle.")
-                continue
 
-            # 3. Compute Indicators on Confirmed Data
-            df['MA9'] = calculate_sma(df['close'], 9)
-            df['MA20'] = calculate_sma(df['close'], 20)
-            
-            # 4. Scan for Crossover
-            # We only need to check the very last confirmed candle interaction with the one before it.
-            # Because we run this every 5 minutes, we just need to catch the latest event.
-            # To be safe against missed runs, we can scan the last 3 candles.
-            
-            scan_depth = 3
-            start_idx = max(1, len(df) - scan_depth)
-            
-            logger.info(f"Scanning last {len(df) - start_idx} confirmed candles...")
+            # 2. Add the new confirmed bars of every configured timeframe to the matrix
+            now = get_ist_time().replace(tzinfo=None)
+            for label, bars, interval in timeframe_bars(symbol_name, df, now):
+                if bars is None or len(bars) < 20:
+                    logger.warning(f"Insufficient data for {label}")
+                    continue
+                matrix.append(label, bars['timestamp'].to_numpy(), bars['close'].to_numpy())
+                scanned[label] = (bars, interval)
 
-            for i in range(start_idx, len(df)):
-                curr_candle = df.iloc[i]
-                prev_candle = df.iloc[i-1]
-                
-                ma9_curr = curr_candle['MA9']
-                ma20_curr = curr_candle['MA20']
-                ma9_prev = prev_candle['MA9']
-                ma20_prev = prev_candle['MA20']
-                
-                close_price = curr_candle['close']
-                timestamp = curr_candle['timestamp']
-                
-                # Detect Crossover
-                is_bullish = detect_bullish_crossover(ma9_prev, ma20_prev, ma9_curr, ma20_curr)
-                is_bearish = detect_bearish_crossover(ma9_prev, ma20_prev, ma9_curr, ma20_curr)
-                
-                if is_bullish or is_bearish:
-                    last_alert_time = last_alert_status.get(symbol_name)
-                    
-                    if last_alert_time != timestamp:
-                        if is_bullish:
-                            emoji = "🚀"
-                            signal = "**BULLISH CROSSOVER CONFIRMED**"
-                            desc = "Signal: MA9 crossed ABOVE MA20"
-                        else:
-                            emoji = "🔴"
-                            signal = "**BEARISH CROSSOVER CONFIRMED**"
-                            desc = "Signal: MA9 crossed BELOW MA20"
-                            
-                        message = (
-                            f"{emoji} {signal}\n\n"
-                            f"Symbol: {symbol_name}\n"
-                            f"{desc}\n"
-                            f"Price: {close_price}\n"
-                            f"Time: {timestamp} (Candle Close)\n"
-                        )
-                        
-                        send_telegram_message(message)
-                        logger.info(f"Alert sent for {symbol_name} at {timestamp}")
-                        
-                        last_alert_status[symbol_name] = timestamp
-                    else:
-                        logger.info(f"Duplicate alert suppressed for {symbol_name} at {timestamp}")
-            
         except RuntimeError as re:
             logger.error(f"RuntimeError processing {symbol_name}: {re}")
             # Check for session issues
             if "Session" in str(re) or "Authorization" in str(re) or "Invalid Token" in str(re):
                 logger.warning("Session appears invalid. Attempting re-login...")
-                if client.login():
+                metrics.inc("smartapi_relogins_total")
+                if client.login(force=True):
                     logger.info("Re-login successful. Continuing...")
                 else:
                     logger.critical("Re-login failed. Exiting script to force restart.")
-                    import sys
                     sys.exit(1)
             else:
                 # Other runtime errors (e.g. rate limit), just log and continue
@@ -159,7 +466,122 @@ def job(client):
         except Exception as e:
             logger.error(f"Error processing {symbol_name}: {e}")
 
-    logger.info("Scan completed.")
+    # 3. Detect crossovers for the whole universe at once, rank this cycle's signals
+    # across all symbols and alert on the best
+    candidates = scan_universe(matrix, scanned)
+    if snapshot_forward is not None:
+        snapshot_forward(snapshot_records(matrix, scanned, candidates))
+    elif snapshot_store is not None:
+        snapshot_updates.update(snapshot_records(matrix, scanned, candidates))
+    dispatch_signals(candidates)
+    if poll_scheduler is not None:
+        schedule_polls(matrix, scanned)
+    record_dispatcher_stats()
+
+def record_dispatcher_stats():
+    stats = alert_dispatcher.stats()
+    metrics.set("alert_queue_depth", stats["queue_depth"])
+    metrics.set("alert_delivery_latency_avg_seconds", round(stats["latency_avg"], 6))
+    metrics.set("alert_delivery_latency_max_seconds", round(stats["latency_max"], 6))
+    metrics.set("alerts_dropped", stats["dropped"])
+    logger.info(f"Scan completed. Alert queue depth: {stats['queue_depth']}, avg delivery latency: {stats['latency_avg']:.2f}s")
+
+def scan_sharded(coordinator):
+    """
+    Coordinator side of sharded mode: one scan cycle across all worker processes.
+    Signals detected by the workers are ranked, deduplicated and delivered here only.
+    """
+    if not is_market_open():
+        logger.info("Market is closed. Skipping scan.")
+        return
+
+    logger.info(f"Starting sharded scan across {len(coordinator.workers)} workers...")
+    candidates = []
+    coordinator.run_cycle(candidates.append, timeout=Config.SCAN_PROCESS_TIMEOUT, on_snapshot=snapshot_updates.update)
+    dispatch_signals(candidates)
+    record_dispatcher_stats()
+
+def run_worker(index, symbols_map, credentials, rate, commands, results):
+    """
+    Entry point of one sharded worker process: scans its own shard of the symbols with
+    its own SmartAPI session whenever the coordinator starts a cycle.
+    """
+    from cluster import worker_loop
+
+    global alert_forward, snapshot_forward, universe_name
+    if universe_name:
+        universe_name = f"{universe_name}-{index}"
+    SYMBOLS_MAP.clear()
+    SYMBOLS_MAP.update(symbols_map)
+    alert_forward = lambda alert: results.put(("alert", index, alert))
+    if Config.SNAPSHOT_PORT or Config.SNAPSHOT_SOCKET:
+        snapshot_forward = lambda records: results.put(("snapshot", index, records))
+
+    client = SmartApiClient(rate_limiter=RateLimiter(rate), credentials=credentials)
+    if not client.login():
+        logger.error(f"Worker {index}: failed to login. Exiting.")
+        return
+
+    worker_loop(index, commands, results, lambda: scan(client))
+
+def run_stream(client, source):
+    """
+    Streaming mode: builds candles (of the base timeframe) locally from ticks and runs the
+    crossover logic the moment each bar closes; higher timeframes are resampled from them.
+    'client' may be None when replaying recorded ticks offline, in which case indicator
+    state is warmed from the local candle cache only.
+    """
+    from tick_stream import CandleAggregator
+
+    token_symbols = {details["token"]: symbol_name for symbol_name, details in SYMBOLS_MAP.items()}
+    base_length = pd.Timedelta(minutes=base_minutes)
+
+    # Warm the moving averages from history so the first streamed candle can alert
+    for symbol_name, details in SYMBOLS_MAP.items():
+        if client is not None:
+            df = candle_store.update(client, details["token"], details["exchange"])
+        else:
+            df = candle_store.get(details["token"], details["exchange"])
+        state = CrossoverState(9, 20)
+        if df is not None and len(df) > 0:
+            for timestamp, close_price in zip(df['timestamp'], df['close']):
+                state.update(close_price, timestamp)
+            for tf, resampler in resamplers.items():
+                bars = resampler.update(symbol_name, df, df['timestamp'].iloc[-1] + base_length)
+                if bars is not None and len(bars) >= 20:
+                    dispatch_signals(scan_candles(timeframe_label(symbol_name, tf), bars, pd.Timedelta(minutes=tf)))
+        crossover_states[timeframe_label(symbol_name, base_minutes)] = state
+
+    def on_candle(token, candle):
+        symbol_name = token_symbols.get(token)
+        if symbol_name is None:
+            return
+
+        timestamp = pd.Timestamp(candle["timestamp"])
+        label = timeframe_label(symbol_name, base_minutes)
+        state = crossover_states[label]
+        if state.last_timestamp is not None and timestamp <= state.last_timestamp:
+            return
+
+        exchange = SYMBOLS_MAP[symbol_name]["exchange"]
+        candle_store.append(token, exchange, candle)
+        ma9, ma20, signal = state.update(candle["close"], timestamp)
+        logger.info(f"Candle closed for {label} at {timestamp}: close={candle['close']} MA9={ma9:.2f} MA20={ma20:.2f}")
+
+        candles = candle_store.get(token, exchange)
+        candidates = []
+        if signal is not None and base_minutes in timeframes:
+            candidates.append(make_candidate(label, signal, candles, len(candles) - 1, interval=base_length))
+
+        # A higher-timeframe bar is confirmed once the base candle ending it has closed
+        for tf, resampler in resamplers.items():
+            bars = resampler.update(symbol_name, candles, timestamp + base_length)
+            if bars is not None and len(bars) >= 20:
+                candidates += scan_candles(timeframe_label(symbol_name, tf), bars, pd.Timedelta(minutes=tf))
+
+        dispatch_signals(candidates)
+
+    source.run(CandleAggregator(on_candle, interval_minutes=base_minutes))
 
 def run_historical_test(client):
     logger.info("Starting historical crossover test...")
@@ -218,9 +640,77 @@ def run_historical_test(client):
     if not found:
         logger.info("No crossover found in the last 10 days.")
 
+def run_sharded(workers, once=False):
+    """
+    Coordinator/worker mode: SYMBOLS_MAP is split across 'workers' processes (each with
+    its own account from Config.WORKER_CREDENTIALS_FILE, if given) and this process only
+    schedules cycles, deduplicates alerts and delivers them.
+    """
+    from cluster import Coordinator, load_credentials
+
+    coordinator = Coordinator(
+        run_worker, SYMBOLS_MAP, workers,
+        credentials=load_credentials(Config.WORKER_CREDENTIALS_FILE),
+        rate=Config.SMARTAPI_HIST_RATE_LIMIT,
+    ).start()
+    try:
+        if once:
+            job(coordinator, scan_sharded)
+            logger.info("Single run completed. Exiting.")
+            return
+
+        scheduler = CandleScheduler(market_calendar, settle_seconds=Config.SCHEDULER_SETTLE_SECONDS)
+        logger.info(f"Scheduler started with {workers} workers. Waiting for next candle close...")
+        scheduler.run(job, coordinator, scan_sharded)
+    finally:
+        coordinator.close()
+
 def main():
     logger.info("Initializing SmartAPI MA Crossover Alert System...")
     
+    # Parse Arguments
+    # Mode-specific modules are imported in their branches so a plain scan doesn't pay for them
+    import argparse
+    parser = argparse.ArgumentParser(description="SmartAPI MA Crossover Alert")
+    parser.add_argument("--once", action="store_true", help="Run the scan once and exit (for cron jobs)")
+    parser.add_argument("--test-history", action="store_true", help="Test alert system using historical data")
+    parser.add_argument("--backtest", nargs=2, metavar=("START", "END"), help="Backtest crossovers between two dates (YYYY-MM-DD)")
+    parser.add_argument("--symbols", help="Comma-separated SYMBOLS_MAP keys for --backtest/--backfill (default: all)")
+    parser.add_argument("--output", default="backtest_signals.csv", help="Where --backtest writes its signal table")
+    parser.add_argument("--backfill", nargs=2, metavar=("START", "END"), help="Download history between two dates (YYYY-MM-DD) into the local archive")
+    parser.add_argument("--watchlist", default=Config.WATCHLIST, help="Comma-separated EXCHANGE:TRADINGSYMBOL list resolved via the instrument master")
+    parser.add_argument("--stream", action="store_true", help="Build candles from live WebSocket ticks instead of polling")
+    parser.add_argument("--record-ticks", metavar="FILE", help="In --stream mode, also append raw ticks to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="Run streaming mode offline over recorded ticks")
+    parser.add_argument("--workers", type=int, default=Config.SCAN_PROCESSES, help="Shard the scan across N worker processes")
+    args = parser.parse_args()
+
+    if Config.METRICS_PORT:
+        start_metrics_server(Config.METRICS_PORT)
+    if snapshot_store is not None:
+        start_snapshot_server(snapshot_store, port=Config.SNAPSHOT_PORT, socket_path=Config.SNAPSHOT_SOCKET)
+
+    # Deliver alerts off the scan loop; pending alerts are flushed on exit
+    import atexit
+    alert_dispatcher.start()
+    atexit.register(alert_dispatcher.close)
+
+    if args.watchlist:
+        # Resolve tokens from Angel One's instrument master (cached per day)
+        from instruments import InstrumentMaster
+        try:
+            instruments = InstrumentMaster.load(Config.INSTRUMENT_CACHE_DIR)
+        except Exception as e:
+            logger.error(f"Failed to load instrument master: {e}")
+            return
+        SYMBOLS_MAP.update(instruments.symbols_map(args.watchlist.split(",")))
+        logger.info(f"Watchlist resolved: {len(SYMBOLS_MAP)} symbols")
+
+    if args.replay:
+        from tick_stream import ReplayTickSource
+        run_stream(None, ReplayTickSource(args.replay))
+        return
+
     # Validate Config
     try:
         Config.validate()
@@ -228,15 +718,22 @@ def main():
         logger.error(e)
         return
 
-    # Parse Arguments
-    import argparse
-    parser = argparse.ArgumentParser(description="SmartAPI MA Crossover Alert")
-    parser.add_argument("--once", action="store_true", help="Run the scan once and exit (for cron jobs)")
-    parser.add_argument("--test-history", action="store_true", help="Test alert system using historical data")
-    args = parser.parse_args()
+    # Sharding only applies to the scan itself (default or --once), not the other modes
+    if args.workers > 0 and not (args.test_history or args.backfill or args.backtest or args.stream):
+        run_sharded(args.workers, once=args.once)
+        return
+
+    symbols_map = SYMBOLS_MAP
+    if args.symbols:
+        names = [name.strip() for name in args.symbols.split(",") if name.strip()]
+        unknown = [name for name in names if name not in SYMBOLS_MAP]
+        if unknown:
+            logger.error(f"Unknown --symbols: {', '.join(unknown)} (not in SYMBOLS_MAP or the watchlist)")
+            return
+        symbols_map = {name: SYMBOLS_MAP[name] for name in names}
 
     # Initialize API Client
-    client = SmartApiClient()
+    client = SmartApiClient(rate_limiter=RateLimiter(Config.SMARTAPI_HIST_RATE_LIMIT))
     if not client.login():
         logger.error("Failed to login. Exiting.")
         return
@@ -250,14 +747,40 @@ def main():
         run_historical_test(client)
         return
 
-    # Schedule Job
-    schedule.every(5).minutes.do(job, client)
+    # --backfill and --backtest share the base interval of the configured timeframes, so
+    # a backtest reads what a backfill archived
+    history_interval = candle_store.interval_name
+
+    if args.backfill:
+        # Resumable: months already archived are skipped on a re-run
+        from candle_archive import backfill
+        start, end = (datetime.strptime(d, "%Y-%m-%d") for d in args.backfill)
+        archive = CandleArchive(Config.ARCHIVE_DIR, history_interval)
+        backfill(client, archive, symbols_map, start, end + timedelta(days=1), max_workers=Config.SCAN_WORKERS)
+        return
+
+    if args.backtest:
+        from backtest import run_backtest
+        start, end = (datetime.strptime(d, "%Y-%m-%d") for d in args.backtest)
+        signals = run_backtest(
+            client, symbols_map, start, end + timedelta(days=1), max_workers=Config.SCAN_WORKERS,
+            archive=CandleArchive(Config.ARCHIVE_DIR, history_interval), interval=history_interval,
+        )
+        signals.to_csv(args.output, index=False)
+        logger.info(f"Backtest signal table written to {args.output}")
+        return
+
+    if args.stream:
+        from tick_stream import SmartApiTickSource
+        run_stream(client, SmartApiTickSource(client, SYMBOLS_MAP, record_path=args.record_ticks))
+        return
+
+    # Schedule Job: run right after each 5-minute candle close (plus settle delay) on trading days
+    scheduler = CandleScheduler(market_calendar, settle_seconds=Config.SCHEDULER_SETTLE_SECONDS)
     
-    logger.info("Scheduler started. Waiting for next run...")
+    logger.info("Scheduler started. Waiting for next candle close...")
     
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    scheduler.run(job, client)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+import os
+import time
+from datetime import date, datetime, timedelta, time as dtime
+from utils import get_logger, get_ist_time
+
+logger = get_logger(__name__)
+
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+CANDLE_INTERVAL = timedelta(minutes=5)
+
+
+class MarketCalendar:
+    """
+    NSE trading calendar: weekdays minus the holidays listed in a local file.
+    """
+
+    def __init__(self, holidays=()):
+        self.holidays = set(holidays)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Loads holidays from a text file with one YYYY-MM-DD date per line ('#' starts a comment).
+        A missing file means no holidays.
+        """
+        holidays = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip()
+                    if line:
+                        holidays.add(date.fromisoformat(line))
+        else:
+            logger.warning(f"Holiday calendar not found at {path}; only weekends will be skipped")
+        return cls(holidays)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, now, grace_seconds=0):
+        """
+        Checks if 'now' (IST) falls in trading hours, allowing 'grace_seconds' after the close
+        so the final candle can still be scanned.
+        """
+        close = (datetime.combine(now.date(), MARKET_CLOSE) + timedelta(seconds=grace_seconds)).time()
+        return self.is_trading_day(now.date()) and MARKET_OPEN <= now.time() <= close
+
+    def next_candle_close(self, now):
+        """
+        Returns the next 5-minute candle close (IST, naive) strictly after 'now', skipping
+        weekends, holidays and out-of-hours times. The first close of a day is 09:20,
+        the last 15:30.
+        """
+        now = now.replace(tzinfo=None)
+        day = now.date()
+        while True:
+            if self.is_trading_day(day):
+                candidate = datetime.combine(day, MARKET_OPEN) + CANDLE_INTERVAL
+                last = datetime.combine(day, MARKET_CLOSE)
+                if now >= candidate:
+                    elapsed = (now - candidate) // CANDLE_INTERVAL + 1
+                    candidate += elapsed * CANDLE_INTERVAL
+                if candidate <= last:
+                    return candidate
+            day += timedelta(days=1)
+            now = datetime.combine(day, dtime(0, 0))
+
+
+class CandleScheduler:
+    """
+    Runs a function right after each 5-minute candle close (plus 'settle_seconds' for the
+    broker to publish the bar), sleeping in between instead of polling.
+    """
+
+    def __init__(self, calendar, settle_seconds=2.0):
+        self.calendar = calendar
+        self.settle = timedelta(seconds=settle_seconds)
+
+    def run(self, fn, *args):
+        while True:
+            now = get_ist_time().replace(tzinfo=None)
+            run_at = self.calendar.next_candle_close(now - self.settle) + self.settle
+            wait = (run_at - now).total_seconds()
+            logger.info(f"Next scan at {run_at.strftime('%Y-%m-%d %H:%M:%S')} IST (in {wait:.0f}s)")
+            time.sleep(max(wait, 0))
+            fn(*args)
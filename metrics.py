@@ -0,0 +1,135 @@
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils import get_logger, get_ist_time
+
+logger = get_logger(__name__)
+
+
+class Metrics:
+    """
+    Thread-safe counters, gauges and per-phase timings for the scan cycle,
+    rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}
+        self.summaries = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            count, total, maximum = self.timings.get(phase, (0, 0.0, 0.0))
+            self.timings[phase] = (count + 1, total + seconds, max(maximum, seconds))
+
+    def record(self, name, value):
+        """
+        Adds one observation to the summary metric 'name' (e.g. detection latency).
+        """
+        with self._lock:
+            count, total, maximum = self.summaries.get(name, (0, 0.0, float("-inf")))
+            self.summaries[name] = (count + 1, total + value, max(maximum, value))
+
+    @contextmanager
+    def timer(self, phase):
+        """
+        Times the wrapped block and records it under 'phase'.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started)
+
+    def render(self):
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            timings = dict(self.timings)
+            summaries = dict(self.summaries)
+
+        lines = []
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE {name} counter", f"{name} {value}"]
+        for name, value in sorted(gauges.items()):
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        if timings:
+            lines.append("# TYPE scan_phase_seconds summary")
+            for phase, (count, total, _) in sorted(timings.items()):
+                lines.append(f'scan_phase_seconds_sum{{phase="{phase}"}} {total:.6f}')
+                lines.append(f'scan_phase_seconds_count{{phase="{phase}"}} {count}')
+            lines.append("# TYPE scan_phase_seconds_max gauge")
+            for phase, (_, _, maximum) in sorted(timings.items()):
+                lines.append(f'scan_phase_seconds_max{{phase="{phase}"}} {maximum:.6f}')
+        for name, (count, total, maximum) in sorted(summaries.items()):
+            lines += [
+                f"# TYPE {name} summary", f"{name}_sum {total:.6f}", f"{name}_count {count}",
+                f"# TYPE {name}_max gauge", f"{name}_max {maximum:.6f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by the client, scanner and job()
+metrics = Metrics()
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serves `metrics.render()` at http://host:port/metrics from a daemon thread.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+@contextmanager
+def profile_cycle(directory):
+    """
+    Profiles the wrapped scan cycle with cProfile and dumps it to 'directory'
+    (one .prof file per cycle). Does nothing when 'directory' is empty.
+    Only the calling thread is profiled; fetch workers show up as time waiting on futures.
+    """
+    if not directory:
+        yield
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(directory, f"cycle-{get_ist_time().strftime('%Y%m%d-%H%M%S')}.prof")
+        profiler.dump_stats(path)
+        logger.info(f"Cycle profile written to {path}")
@@ -0,0 +1,129 @@
+import numpy as np
+from market_calendar import MARKET_CLOSE
+from universe_matrix import FAST_PERIOD, MA_DECIMALS, SLOW_PERIOD
+from utils import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+# Floor for the assumed per-bar move (% of price), so a flat recent history never makes
+# a symbol look frozen
+MIN_MOVE_PCT = 0.05
+
+
+def spread_weights(max_bars):
+    """
+    Weights of MA9 - MA20 after k more bars, for k = 0..max_bars: 'known[k]' over the
+    current last SLOW_PERIOD closes and 'future[k, i - 1]' over the close of bar i ahead.
+    """
+    known = np.zeros((max_bars + 1, SLOW_PERIOD))
+    future = np.zeros((max_bars + 1, max_bars))
+    for k in range(max_bars + 1):
+        weights = np.zeros(SLOW_PERIOD + k)
+        weights[-FAST_PERIOD:] += 1 / FAST_PERIOD
+        weights[-SLOW_PERIOD:] -= 1 / SLOW_PERIOD
+        known[k] = weights[:SLOW_PERIOD]
+        future[k, :k] = weights[SLOW_PERIOD:]
+    return known, future
+
+
+def bars_until_crossover(closes, max_bars, volatility_factor=2.0, volatility_bars=20):
+    """
+    For each row of closes (oldest to newest), the first bar ahead (1..max_bars) on which
+    MA9 - MA20 could reach the other side of zero, assuming each future close moves at most
+    'volatility_factor' times the largest bar-to-bar move of the last 'volatility_bars'.
+    MA9 - MA20 is linear in the future closes, so its extreme after k bars is the current
+    trend of the known closes plus the largest move in the direction that closes the gap.
+    Rows without enough history, or with MA9 == MA20, get 1 (poll every candle); rows that
+    cannot cross within max_bars get max_bars.
+    """
+    known, future = spread_weights(max_bars)
+    recent = closes[:, -SLOW_PERIOD:]
+    last = recent[:, -1]
+
+    moves = np.abs(np.diff(closes[:, -volatility_bars - 1:], axis=1))
+    step = volatility_factor * np.where(np.isnan(moves), 0.0, moves).max(axis=1)
+    step = np.maximum(step, last * MIN_MOVE_PCT / 100)
+
+    # Spread after k bars if prices stayed at the last close, and how far moves can push it
+    spread = recent @ known.T + last[:, None] * future.sum(axis=1)
+    reach = step[:, None] * (np.abs(future) * np.arange(1, max_bars + 1)).sum(axis=1)
+
+    # A spread that rounds to zero is a tie (as in UniverseMatrix): either cross is one bar away
+    current = np.round(spread[:, :1], MA_DECIMALS)
+    with np.errstate(invalid="ignore"):
+        possible = np.where(current > 0, spread - reach <= 0, spread + reach >= 0)[:, 1:]
+    possible |= ~(np.abs(current) > 0)
+    return np.where(possible.any(axis=1), possible.argmax(axis=1) + 1, max_bars)
+
+
+class PollScheduler:
+    """
+    Decides which symbols are fetched each cycle. When a symbol is scanned its next poll
+    is set to the close of the first bar on which a crossover is reachable (see
+    bars_until_crossover) on any of its timeframes, at most 'max_bars' bars ahead and no
+    later than the session close. Symbols near a cross are polled every candle; distant
+    ones far less often.
+
+    No crossover is missed: a skipped symbol's candles are fetched in one incremental
+    request at its next poll, and every bar since its last scan is checked then. Within
+    the volatility bound a crossover is even seen on time; a move beyond it delays the
+    alert by at most max_bars - 1 bars.
+    """
+
+    def __init__(self, max_bars, volatility_factor=2.0, volatility_bars=20):
+        self.max_bars = max_bars
+        self.volatility_factor = volatility_factor
+        self.volatility_bars = volatility_bars
+        self.next_poll = {}
+
+    def due(self, symbols_map, now):
+        """
+        Returns the part of 'symbols_map' to fetch at 'now' (naive IST) and reports what
+        the skipped symbols save.
+        """
+        now = np.datetime64(now, "ns")
+        due = {}
+        latest = now
+        for symbol_name, details in symbols_map.items():
+            next_poll = self.next_poll.get(symbol_name)
+            if next_poll is None or next_poll <= now:
+                due[symbol_name] = details
+            else:
+                latest = max(latest, next_poll)
+
+        skipped = len(symbols_map) - len(due)
+        # A crossover the volatility bound didn't foresee waits at most this long
+        worst_delay = (latest - now) / np.timedelta64(1, "s")
+        metrics.set("poll_symbols_due", len(due))
+        metrics.set("poll_requests_saved", skipped)
+        metrics.inc("poll_requests_saved_total", skipped)
+        metrics.set("poll_worst_case_delay_seconds", worst_delay)
+        logger.info(
+            f"Adaptive polling: fetching {len(due)}/{len(symbols_map)} symbols, {skipped} requests saved; "
+            f"worst-case detection delay {worst_delay / 60:.0f} min"
+        )
+        return due
+
+    def update(self, symbol_names, closes, last_starts, bar_minutes):
+        """
+        Schedules the next poll of freshly scanned symbols.
+        'closes' is symbols x timeframes x bars (newest last), 'last_starts' the start of
+        each row's newest bar (datetime64) and 'bar_minutes' the length of each timeframe.
+        """
+        if not symbol_names:
+            return
+        symbols, timeframes, bars = closes.shape
+        ahead = bars_until_crossover(
+            closes.reshape(-1, bars), self.max_bars, self.volatility_factor, self.volatility_bars,
+        ).reshape(symbols, timeframes)
+
+        last_starts = np.asarray(last_starts, dtype="datetime64[ns]")
+        bar_length = np.asarray(bar_minutes, dtype="timedelta64[m]")
+        # Close of the first bar that could cross: 'ahead' bars after the newest one
+        next_poll = last_starts + (ahead + 1) * bar_length
+        session_close = last_starts.astype("datetime64[D]") + np.timedelta64(MARKET_CLOSE.hour * 60 + MARKET_CLOSE.minute, "m")
+        next_poll = np.minimum(next_poll, session_close).min(axis=1)
+
+        for symbol_name, poll_at in zip(symbol_names, next_poll):
+            self.next_poll[symbol_name] = poll_at
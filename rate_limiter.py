@@ -0,0 +1,48 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter shared by every thread that calls SmartAPI.
+    Backoff is shared too: a throttled (AB1004) request pauses the whole bucket once
+    instead of each worker sleeping and retrying on its own schedule.
+    'clock' and 'sleep' default to time.monotonic and time.sleep; tests inject a fake clock.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request slot is available.
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def backoff(self, seconds):
+        """
+        Pauses all callers for 'seconds' and drains the bucket so they resume at the base rate.
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from utils import get_logger, get_ist_time
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+CANDLE_MINUTES = 5
+
+
+def next_candle_boundary(now):
+    """
+    Returns the next 5-minute candle boundary strictly after 'now'.
+    """
+    floored = now.replace(minute=now.minute - now.minute % CANDLE_MINUTES, second=0, microsecond=0)
+    return floored + timedelta(minutes=CANDLE_MINUTES)
+
+
+class ScanEngine:
+    """
+    Fetches candles for many symbols concurrently.
+    Request pacing is left to the client's shared RateLimiter, so adding workers
+    overlaps network latency without exceeding the SmartAPI historical quota.
+    """
+
+    def __init__(self, client, candle_store, max_workers=8):
+        self.client = client
+        self.candle_store = candle_store
+        self.max_workers = max_workers
+        self.finished_at = {}
+
+    def _fetch(self, symbol_name, details):
+        try:
+            return self.candle_store.update(self.client, details["token"], details["exchange"])
+        finally:
+            self.finished_at[symbol_name] = get_ist_time()
+
+    def fetch_all(self, symbols_map):
+        """
+        Yields (symbol_name, future) pairs in completion order.
+        Calling future.result() returns the confirmed candles or re-raises the fetch error.
+        """
+        started = get_ist_time()
+        start_clock = time.perf_counter()
+        boundary = next_candle_boundary(started)
+        self.finished_at = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch, symbol_name, details): symbol_name
+                for symbol_name, details in symbols_map.items()
+            }
+            for future in as_completed(futures):
+                yield futures[future], future
+
+        wall_time = time.perf_counter() - start_clock
+        on_time = sum(1 for finished in self.finished_at.values() if finished < boundary)
+        metrics.set("scan_fetch_wall_seconds", round(wall_time, 6))
+        metrics.set("scan_symbols_on_time", on_time)
+        metrics.set("scan_symbols_total", len(symbols_map))
+        logger.info(
+            f"Scan cycle took {wall_time:.2f}s: {on_time}/{len(symbols_map)} symbols fetched "
+            f"before next candle boundary ({boundary.strftime('%H:%M')})"
+        )
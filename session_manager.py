@@ -0,0 +1,187 @@
+import base64
+import fcntl
+import json
+import os
+import threading
+import time
+from utils import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+
+def jwt_expiry(token):
+    """
+    Reads the `exp` claim (epoch seconds) from a JWT without verifying it. Returns None if absent.
+    """
+    try:
+        payload = token.split()[-1].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except Exception:
+        return None
+
+
+def smart_connect(**kwargs):
+    """
+    Builds a SmartConnect. SmartApi is imported here rather than at module level: it is
+    slow to import and makes a network request while doing so, and many runs (after-hours
+    cron invocations, offline replays) never need it.
+    """
+    from SmartApi import SmartConnect
+    return SmartConnect(**kwargs)
+
+
+class SessionManager:
+    """
+    Owns the SmartAPI session for every client, worker and process on the host.
+    JWT/refresh/feed tokens are cached on disk; a cached session is reused until it is
+    within 'refresh_margin' seconds of expiry, then renewed with the refresh token. A full
+    TOTP login only happens when there is no usable cached session or the refresh fails.
+    A file lock keeps concurrent processes from all logging in at once.
+    """
+
+    def __init__(self, api_key, client_id, mpin, totp_secret, cache_path, refresh_margin=1800, max_age=12 * 3600, root=None):
+        self.api_key = api_key
+        self.client_id = client_id
+        self.mpin = mpin
+        self.totp_secret = totp_secret
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.max_age = max_age
+        # SmartAPI base URL; None uses the library default (production)
+        self.root = root
+        self.tokens = None
+        self.smart_api = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns a SmartConnect with a valid session, refreshing or logging in if needed.
+        Returns None if no session could be established.
+        """
+        with self._lock:
+            if self._fresh(self.tokens):
+                return self.smart_api
+
+            with self._file_lock():
+                # Another process may have renewed the session while we waited for the lock
+                cached = self._load()
+                if self._fresh(cached):
+                    self._use(cached)
+                    logger.info("Reusing cached SmartAPI session")
+                    return self.smart_api
+
+                tokens = None
+                if cached or self.tokens:
+                    tokens = self._refresh(cached or self.tokens)
+                if tokens is None:
+                    tokens = self._login()
+                if tokens is None:
+                    return None
+
+                self._save(tokens)
+                self._use(tokens)
+                return self.smart_api
+
+    def invalidate(self):
+        """
+        Marks the current session as unusable (e.g. after an "Invalid Token" error) so the
+        next get() renews it.
+        """
+        with self._lock:
+            if self.tokens:
+                self.tokens = dict(self.tokens, expires_at=0)
+            with self._file_lock():
+                cached = self._load()
+                if cached and self.tokens and cached.get("jwtToken") == self.tokens.get("jwtToken"):
+                    self._save(self.tokens)
+
+    def _fresh(self, tokens):
+        return bool(tokens) and tokens.get("expires_at", 0) - time.time() > self.refresh_margin
+
+    def _use(self, tokens):
+        self.tokens = tokens
+        self.smart_api = smart_connect(
+            api_key=self.api_key,
+            access_token=tokens["jwtToken"].split()[-1],
+            refresh_token=tokens["refreshToken"],
+            feed_token=tokens["feedToken"],
+            root=self.root,
+        )
+        self.smart_api.setUserId(self.client_id)
+
+    def _tokens(self, jwt_token, refresh_token, feed_token):
+        jwt_token = jwt_token if jwt_token.startswith("Bearer ") else f"Bearer {jwt_token}"
+        expires_at = jwt_expiry(jwt_token) or time.time() + self.max_age
+        return {"jwtToken": jwt_token, "refreshToken": refresh_token, "feedToken": feed_token, "expires_at": expires_at}
+
+    def _refresh(self, tokens):
+        try:
+            # generateTokens authenticates with the current (possibly expired) JWT as Bearer
+            smart_api = smart_connect(api_key=self.api_key, access_token=tokens["jwtToken"].split()[-1], root=self.root)
+            data = smart_api.generateToken(tokens["refreshToken"])
+            if not data.get("status"):
+                logger.warning(f"SmartAPI token refresh failed: {data.get('message')}")
+                return None
+            metrics.inc("smartapi_token_refreshes_total")
+            logger.info("SmartAPI session refreshed with refresh token")
+            return self._tokens(
+                data["data"]["jwtToken"],
+                data["data"].get("refreshToken", tokens["refreshToken"]),
+                data["data"]["feedToken"],
+            )
+        except Exception as e:
+            logger.warning(f"Error refreshing SmartAPI session: {e}")
+            return None
+
+    def _login(self):
+        try:
+            smart_api = smart_connect(api_key=self.api_key, root=self.root)
+            import pyotp
+            totp = pyotp.TOTP(self.totp_secret).now()
+            data = smart_api.generateSession(self.client_id, self.mpin, totp)
+            metrics.inc("smartapi_logins_total")
+
+            if data['status']:
+                logger.info("SmartAPI Login Successful")
+                return self._tokens(data['data']['jwtToken'], data['data']['refreshToken'], data['data']['feedToken'])
+            logger.error(f"SmartAPI Login Failed: {data['message']}")
+            return None
+        except Exception as e:
+            logger.error(f"Error during SmartAPI login: {e}")
+            return None
+
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        return _FileLock(f"{self.cache_path}.lock")
+
+    def _load(self):
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, tokens):
+        tmp_path = f"{self.cache_path}.tmp"
+        # Tokens are credentials: keep the cache readable by this user only
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(tokens, f)
+        os.replace(tmp_path, self.cache_path)
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, "a")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
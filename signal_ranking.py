@@ -0,0 +1,105 @@
+import numpy as np
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+# Candles of context captured with each signal: the signal bar plus the 20 before it
+WINDOW = 21
+# MA9 slope is measured over this many bars
+SLOPE_BARS = 3
+
+# Feature value that earns the full share of the score, and each feature's weight
+SCORE_CAPS = {"volume_ratio": 2.0, "ma_slope_pct": 0.1, "spread_pct": 0.1}
+SCORE_WEIGHTS = {"volume_ratio": 0.4, "ma_slope_pct": 0.3, "spread_pct": 0.3}
+
+
+class Candidate:
+    """
+    One detected signal waiting for the end-of-cycle ranking, with the closes and volumes
+    of the bars leading up to it (oldest first, NaN-padded to WINDOW).
+    Plain attributes only, so it pickles cheaply between sharded workers and the coordinator.
+    """
+
+    def __init__(self, symbol_name, signal, close_price, timestamp, rule_name, interval, closes, volumes):
+        self.symbol_name = symbol_name
+        self.signal = signal
+        self.close_price = close_price
+        self.timestamp = timestamp
+        self.rule_name = rule_name
+        self.interval = interval
+        self.closes = closes
+        self.volumes = volumes
+        self.features = None
+        self.score = None
+
+
+def signal_window(df, i):
+    """
+    Returns the (closes, volumes) context for a signal on row 'i' of a candle frame.
+    """
+    start = max(0, i + 1 - WINDOW)
+    closes = np.full(WINDOW, np.nan)
+    volumes = np.full(WINDOW, np.nan)
+    closes[WINDOW - (i + 1 - start):] = df['close'].to_numpy(dtype=np.float64)[start:i + 1]
+    volumes[WINDOW - (i + 1 - start):] = df['volume'].to_numpy(dtype=np.float64)[start:i + 1]
+    return closes, volumes
+
+
+def compute_features(candidates):
+    """
+    Confirmation features for all candidates at once, each signed so that larger means
+    more in the signal's direction:
+    - volume_ratio: signal-bar volume / average volume of the 20 bars before it
+    - ma_slope_pct: MA9 change per bar over the last SLOPE_BARS bars, in % of MA9
+    - spread_pct: MA9 - MA20 at the signal bar, in % of the close (how far past the cross)
+    """
+    closes = np.stack([c.closes for c in candidates])
+    volumes = np.stack([c.volumes for c in candidates])
+    direction = np.array([1.0 if c.signal == "BULLISH" else -1.0 for c in candidates])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ma9 = closes[:, -9:].mean(axis=1)
+        ma9_before = closes[:, -9 - SLOPE_BARS:-SLOPE_BARS].mean(axis=1)
+        ma20 = closes[:, -20:].mean(axis=1)
+        volume_ratio = volumes[:, -1] / np.nanmean(volumes[:, :-1], axis=1)
+        features = {
+            "volume_ratio": volume_ratio,
+            "ma_slope_pct": direction * (ma9 - ma9_before) / ma9_before * 100 / SLOPE_BARS,
+            "spread_pct": direction * (ma9 - ma20) / closes[:, -1] * 100,
+        }
+    return {name: np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0) for name, values in features.items()}
+
+
+def score_features(features):
+    """
+    Weighted sum of each feature clipped to [0, its cap] and scaled to [0, 1]; 0..1 overall.
+    """
+    return sum(
+        SCORE_WEIGHTS[name] * np.clip(features[name] / SCORE_CAPS[name], 0.0, 1.0)
+        for name in SCORE_WEIGHTS
+    )
+
+
+def rank_signals(candidates, top_n=0, min_score=0.0, min_volume_ratio=0.0):
+    """
+    Scores one cycle's candidates in a single vectorized pass and returns
+    (selected, rejected): best first, keeping those at or above the thresholds and at most
+    'top_n' of them (0 = no limit).
+    """
+    if not candidates:
+        return [], []
+
+    features = compute_features(candidates)
+    scores = score_features(features)
+    for i, candidate in enumerate(candidates):
+        candidate.features = {name: float(values[i]) for name, values in features.items()}
+        candidate.score = float(scores[i])
+
+    order = np.argsort(-scores, kind="stable")
+    passed = (scores >= min_score) & (features["volume_ratio"] >= min_volume_ratio)
+    selected = [candidates[i] for i in order if passed[i]]
+    if top_n:
+        selected = selected[:top_n]
+    chosen = {id(c) for c in selected}
+    rejected = [candidates[i] for i in order if id(candidates[i]) not in chosen]
+    return selected, rejected
@@ -1,74 +1,108 @@
-from SmartApi import SmartConnect
-import pyotp
-import pandas as pd
-from datetime import datetime, timedelta
+import os
+from datetime import timedelta
 from config import Config
-from utils import get_logger
+from utils import get_logger, get_ist_time
+from metrics import metrics
+from candle_frame import CandleFrame
+from session_manager import SessionManager
 import time
 
 logger = get_logger(__name__)
 
 class SmartApiClient:
-    def __init__(self):
-        self.api_key = Config.SMARTAPI_API_KEY
-        self.client_id = Config.SMARTAPI_CLIENT_ID
-        self.mpin = Config.SMARTAPI_MPIN
-        self.totp_secret = Config.SMARTAPI_TOTP_SECRET
+    def __init__(self, rate_limiter=None, session_manager=None, credentials=None):
+        """
+        'credentials' (api_key, client_id, mpin, totp_secret) overrides the Config account,
+        e.g. for a sharded worker with its own API key.
+        """
+        credentials = credentials or {}
+        self.api_key = credentials.get("api_key", Config.SMARTAPI_API_KEY)
+        self.client_id = credentials.get("client_id", Config.SMARTAPI_CLIENT_ID)
+        self.mpin = credentials.get("mpin", Config.SMARTAPI_MPIN)
+        self.totp_secret = credentials.get("totp_secret", Config.SMARTAPI_TOTP_SECRET)
         self.smart_api = None
         self.session = None
+        self.rate_limiter = rate_limiter
+
+        # One session cache per account
+        cache_path = Config.SESSION_CACHE_PATH
+        if credentials:
+            root, ext = os.path.splitext(cache_path)
+            cache_path = f"{root}_{self.client_id}{ext}"
 
-    def login(self):
+        # Shared session: cached on disk, refreshed ahead of expiry, TOTP login only as a fallback
+        self.session_manager = session_manager or SessionManager(
+            self.api_key, self.client_id, self.mpin, self.totp_secret, cache_path, root=Config.SMARTAPI_ROOT_URL
+        )
+
+    def login(self, force=False):
         """
-        Authenticates with Angel One SmartAPI using TOTP.
+        Authenticates with Angel One SmartAPI through the SessionManager.
+        Reuses a cached session when possible; 'force' discards the current session first.
         """
-        try:
-            self.smart_api = SmartConnect(api_key=self.api_key)
-            totp = pyotp.TOTP(self.totp_secret).now()
-            data = self.smart_api.generateSession(self.client_id, self.mpin, totp)
-            
-            if data['status']:
-                self.session = data['data']
-                logger.info("SmartAPI Login Successful")
-                return True
-            else:
-                logger.error(f"SmartAPI Login Failed: {data['message']}")
-                return False
-        except Exception as e:
-            logger.error(f"Error during SmartAPI login: {e}")
+        if force:
+            self.session_manager.invalidate()
+
+        smart_api = self.session_manager.get()
+        if smart_api is None:
             return False
 
-    def get_5min_candles(self, symbol_token, exchange="NSE", days=5, max_retries=3):
+        self.smart_api = smart_api
+        self.session = self.session_manager.tokens
+        return True
+
+    def get_5min_candles(self, symbol_token, exchange="NSE", days=5, max_retries=3, from_date=None, to_date=None, as_frame=False):
+        """
+        Fetches 5-minute candles for the last 'days', or between 'from_date' and 'to_date' when given.
         """
-        Fetches 5-minute candles for the last 'days'.
+        return self.get_candles(symbol_token, exchange, "FIVE_MINUTE", days, max_retries, from_date, to_date, as_frame)
+
+    def get_candles(self, symbol_token, exchange="NSE", interval="FIVE_MINUTE", days=5, max_retries=3, from_date=None, to_date=None, as_frame=False):
+        """
+        Fetches candles of a SmartAPI 'interval' (e.g. "ONE_MINUTE") for the last 'days',
+        or between 'from_date' and 'to_date' when given.
+        Returns a DataFrame, or a CandleFrame of typed arrays when 'as_frame' is True.
         Implements retry logic with exponential backoff for transient errors.
         """
         if not self.smart_api:
             logger.error("API not initialized. Call login() first.")
             return None
 
-        # Calculate time range (timezone-naive for consistency)
-        to_date = datetime.now()
-        from_date = to_date - timedelta(days=days)
+        # Picks up a proactively refreshed session (cheap when the current one is still fresh)
+        self.login()
+
+        # Calculate time range in IST (timezone-naive, matching SmartAPI candle timestamps)
+        if to_date is None:
+            to_date = get_ist_time().replace(tzinfo=None)
+        if from_date is None:
+            from_date = to_date - timedelta(days=days)
         
         historicParam = {
             "exchange": exchange,
             "symboltoken": symbol_token,
-            "interval": "FIVE_MINUTE",
+            "interval": interval,
             "fromdate": from_date.strftime("%Y-%m-%d %H:%M"), 
             "todate": to_date.strftime("%Y-%m-%d %H:%M")
         }
         
         for attempt in range(max_retries):
             try:
-                data = self.smart_api.getCandleData(historicParam)
-                logger.info(f"SmartAPI Response: {data}")
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                with metrics.timer("fetch"):
+                    data = self.smart_api.getCandleData(historicParam)
+                metrics.inc("smartapi_requests_total")
+                # Lazy formatting: the raw payload is only rendered when DEBUG is enabled
+                logger.debug("SmartAPI Response: %s", data)
                 
                 if data and 'status' in data and data['status'] is True and 'data' in data:
-                    # SmartAPI returns: [timestamp, open, high, low, close, volume]
-                    df = pd.DataFrame(data['data'], columns=["timestamp", "open", "high", "low", "close", "volume"])
-                    # Convert to datetime and ensure timezone-naive
-                    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
-                    df['close'] = df['close'].astype(float)
+                    with metrics.timer("parse"):
+                        # SmartAPI returns: [timestamp, open, high, low, close, volume]
+                        # Decoded straight into int64 epoch / float64 arrays (IST wall clock, timezone-naive)
+                        frame = CandleFrame.from_payload(data['data'])
+                        if as_frame:
+                            return frame
+                        df = frame.to_dataframe()
                     
                     # Return all rows
                     return df
@@ -78,10 +112,17 @@ class SmartApiClient:
                     error_code = data.get('errorcode', '')
                     
                     # Check if it's a transient error (AB1004)
+                    if error_code == 'AB1004':
+                        metrics.inc("smartapi_throttles_total")
                     if error_code == 'AB1004' and attempt < max_retries - 1:
                         wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
+                        metrics.inc("smartapi_retries_total")
                         logger.warning(f"Transient error {error_code} for {symbol_token}. Retrying in {wait_time}s... (Attempt {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
+                        if self.rate_limiter:
+                            # Throttling applies to the whole API key, so pause every worker
+                            self.rate_limiter.backoff(wait_time)
+                        else:
+                            time.sleep(wait_time)
                         continue
                     
                     logger.error(f"SmartAPI Error for {symbol_token}: {error_msg}")
@@ -97,6 +138,7 @@ class SmartApiClient:
                 if attempt < max_retries - 1:
                     wait_time = 2 ** attempt
                     logger.warning(f"Error fetching candles for {symbol_token}: {e}. Retrying in {wait_time}s... (Attempt {attempt + 1}/{max_retries})")
+                    metrics.inc("smartapi_retries_total")
                     time.sleep(wait_time)
                     continue
                 else:
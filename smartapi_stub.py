@@ -0,0 +1,261 @@
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import numpy as np
+
+SESSION_MINUTES = 375  # 09:15 to 15:30
+INTERVAL_MINUTES = {
+    "ONE_MINUTE": 1, "THREE_MINUTE": 3, "FIVE_MINUTE": 5, "TEN_MINUTE": 10,
+    "FIFTEEN_MINUTE": 15, "THIRTY_MINUTE": 30, "ONE_HOUR": 60,
+}
+
+
+@lru_cache(maxsize=64)
+def _bar_labels(day, interval_minutes):
+    session_open = datetime.combine(day, datetime.min.time()) + timedelta(hours=9, minutes=15)
+    starts = [session_open + timedelta(minutes=offset) for offset in range(0, SESSION_MINUTES, interval_minutes)]
+    return starts, [start.strftime("%Y-%m-%dT%H:%M:%S+05:30") for start in starts]
+
+
+def synthetic_candles(token, interval_minutes, from_date, to_date):
+    """
+    Deterministic OHLCV rows for 'token' between two IST datetimes, in getCandleData layout.
+    Prices are a token-specific mix of sine waves sampled per minute, so MA9/MA20 cross
+    regularly and any two requests (or intervals) for the same minutes agree exactly.
+    """
+    seed = zlib.crc32(str(token).encode())
+    base = 100 + seed % 900
+    phase = (seed % 1000) / 1000 * 2 * np.pi
+    period = 60 + seed % 120
+    offsets = np.arange(0, SESSION_MINUTES, interval_minutes)
+
+    rows = []
+    day = from_date.date()
+    while day <= to_date.date():
+        if day.weekday() < 5:
+            starts, labels = _bar_labels(day, interval_minutes)
+            k = (starts[0] - datetime(1970, 1, 1)).total_seconds() // 60 + np.arange(SESSION_MINUTES)
+            prices = base * (
+                1 + 0.01 * np.sin(2 * np.pi * k / period + phase) + 0.004 * np.sin(2 * np.pi * k / (period / 3.7) + 2 * phase)
+            )
+            volumes = 1000 + (k.astype(np.int64) * 2654435761 + seed) % 997
+
+            opens = np.round(prices[offsets], 2).tolist()
+            highs = np.round(np.maximum.reduceat(prices, offsets), 2).tolist()
+            lows = np.round(np.minimum.reduceat(prices, offsets), 2).tolist()
+            closes = np.round(prices[np.minimum(offsets + interval_minutes, SESSION_MINUTES) - 1], 2).tolist()
+            bar_volumes = np.add.reduceat(volumes, offsets).tolist()
+
+            for i, start in enumerate(starts):
+                if from_date <= start <= to_date:
+                    rows.append([labels[i], opens[i], highs[i], lows[i], closes[i], bar_volumes[i]])
+        day += timedelta(days=1)
+    return rows
+
+
+def load_recorded(path):
+    """
+    Loads recorded getCandleData rows: a JSON object
+    {"interval": "FIVE_MINUTE", "candles": {token: [[timestamp, open, high, low, close, volume], ...]}}.
+    """
+    with open(path) as f:
+        recorded = json.load(f)
+    return recorded.get("interval", "FIVE_MINUTE"), recorded["candles"]
+
+
+def _jwt(subject, expires_at):
+    def encode(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'none'})}.{encode({'sub': subject, 'exp': int(expires_at)})}.{uuid.uuid4().hex}"
+
+
+class SmartApiStub:
+    """
+    Local stand-in for the SmartAPI REST endpoints the scanner uses: loginByPassword
+    (generateSession), generateTokens, getProfile and getCandleData.
+    Candles are synthetic (see synthetic_candles) or replayed from 'recorded' rows
+    (see load_recorded). Any client id, MPIN and TOTP are accepted; issued JWTs carry a
+    real `exp` claim.
+    Load knobs: 'latency' (+ up to 'jitter') seconds per request, an 'error_rate' share of
+    candle requests answered with a transient AB1004, and a per-API-key 'rate_limit'
+    (requests/second) beyond which requests are rejected with AB1004 as well.
+    Point Config.SMARTAPI_ROOT_URL (SMARTAPI_ROOT_URL env var) at `url` to use it.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, session_ttl=6 * 3600, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit=0, recorded=None, seed=0):
+        self.session_ttl = session_ttl
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.recorded_interval, self.recorded = recorded or (None, None)
+        self.requests = 0
+        self.logins = 0
+        self.refreshes = 0
+        self.throttled = 0
+        self.injected_errors = 0
+        self.candle_requests = {}
+        self._tokens = set()
+        self._windows = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    def _issue(self, client_id):
+        jwt_token = _jwt(client_id, time.time() + self.session_ttl)
+        with self._lock:
+            self._tokens.add(jwt_token)
+        return {"jwtToken": jwt_token, "refreshToken": uuid.uuid4().hex, "feedToken": uuid.uuid4().hex}
+
+    def revoke(self):
+        """
+        Invalidates every issued token, as a server-side logout or session purge does.
+        """
+        with self._lock:
+            self._tokens.clear()
+
+    def _delay(self):
+        with self._lock:
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _over_limit(self, api_key):
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(api_key, deque())
+            while window and now - window[0] >= 1.0:
+                window.popleft()
+            if len(window) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            window.append(now)
+            return False
+
+    def handle(self, route, payload, authorization, api_key=None):
+        """
+        Returns the JSON response body for one API call.
+        """
+        with self._lock:
+            self.requests += 1
+        self._delay()
+
+        if route.endswith("/loginByPassword"):
+            with self._lock:
+                self.logins += 1
+            return {"status": True, "message": "SUCCESS", "errorcode": "", "data": self._issue(payload.get("clientcode"))}
+        token = (authorization or "").split()[-1] if authorization else ""
+        with self._lock:
+            authorized = token in self._tokens
+        if not authorized:
+            return {"status": False, "message": "Invalid Token", "errorcode": "AG8001", "data": None}
+
+        if route.endswith("/generateTokens"):
+            with self._lock:
+                self.refreshes += 1
+            return {"status": True, "message": "SUCCESS", "errorcode": "", "data": self._issue("refresh")}
+        if route.endswith("/getProfile"):
+            return {"status": True, "message": "SUCCESS", "errorcode": "", "data": {"clientcode": "STUB", "name": "Stub User"}}
+        if route.endswith("/getCandleData"):
+            if self._over_limit(api_key):
+                return {"status": False, "message": "Access denied because of exceeding access rate", "errorcode": "AB1004", "data": None}
+            with self._lock:
+                inject = self.error_rate and self._random.random() < self.error_rate
+                if inject:
+                    self.injected_errors += 1
+            if inject:
+                return {"status": False, "message": "Something Went Wrong, Please Try After Sometime", "errorcode": "AB1004", "data": None}
+            return self.candles(payload)
+        return {"status": False, "message": f"Unsupported route {route}", "errorcode": "AB1000", "data": None}
+
+    def candles(self, payload):
+        token = str(payload.get("symboltoken"))
+        with self._lock:
+            self.candle_requests[token] = self.candle_requests.get(token, 0) + 1
+        interval = INTERVAL_MINUTES.get(payload.get("interval"))
+        if interval is None:
+            return {"status": False, "message": "Invalid interval", "errorcode": "AB1000", "data": None}
+        from_date = datetime.strptime(payload["fromdate"], "%Y-%m-%d %H:%M")
+        to_date = datetime.strptime(payload["todate"], "%Y-%m-%d %H:%M")
+
+        if self.recorded is not None:
+            if payload.get("interval") != self.recorded_interval:
+                return {"status": False, "message": "Interval not recorded", "errorcode": "AB1000", "data": None}
+            # Recorded timestamps share one fixed-width ISO layout, so string order is time order
+            start, end = from_date.strftime("%Y-%m-%dT%H:%M"), to_date.strftime("%Y-%m-%dT%H:%M:%S")
+            rows = [row for row in self.recorded.get(token, []) if start <= row[0][:16] and row[0][:19] <= end]
+            return {"status": True, "message": "SUCCESS", "errorcode": "", "data": rows}
+
+        return {"status": True, "message": "SUCCESS", "errorcode": "", "data": synthetic_candles(token, interval, from_date, to_date)}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self, payload):
+                body = stub.handle(
+                    urlparse(self.path).path, payload, self.headers.get("Authorization"), self.headers.get("X-PrivateKey")
+                )
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._respond(json.loads(self.rfile.read(length) or b"{}"))
+
+            def do_GET(self):
+                self._respond({})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SmartAPI stub")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of candle requests answered with AB1004")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Candle requests/second per API key (0 = unlimited)")
+    parser.add_argument("--recorded", metavar="FILE", help="Serve recorded candles instead of synthetic ones")
+    args = parser.parse_args()
+
+    stub = SmartApiStub(
+        port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, recorded=load_recorded(args.recorded) if args.recorded else None,
+    )
+    print(f"SmartAPI stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{stub.requests} requests, {stub.logins} logins, {stub.throttled} throttled, {stub.injected_errors} injected errors")
@@ -0,0 +1,191 @@
+import json
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from utils import get_logger, get_ist_time
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class Snapshot:
+    """
+    One published version of the scanner state. Immutable once built: the full JSON body
+    and every record are encoded up front, so requests only copy bytes.
+    """
+
+    def __init__(self, version, cycle, published_at, records, encoded, changed, removed):
+        self.version = version
+        self.cycle = cycle
+        self.published_at = published_at
+        self.records = records
+        self.encoded = encoded
+        self.changed = changed
+        self.removed = removed
+        self.etag = f'"{version}"'
+        self.body = self._body(encoded)
+        self._changes = {}
+        self._lock = threading.Lock()
+
+    def _body(self, encoded, extra=b""):
+        symbols = b",".join(json.dumps(label).encode() + b":" + data for label, data in encoded.items())
+        head = json.dumps({"version": self.version, "cycle": self.cycle, "published_at": self.published_at})[:-1].encode()
+        return head + extra + b', "symbols": {' + symbols + b"}}"
+
+    def changes(self, since):
+        """
+        JSON body with the records changed (and the labels removed) after version 'since'.
+        Bodies are cached per 'since', as consumers polling each cycle all ask for the same one.
+        """
+        with self._lock:
+            body = self._changes.get(since)
+        if body is not None:
+            return body
+
+        encoded = {label: data for label, data in self.encoded.items() if self.changed[label] > since}
+        removed = sorted(label for label, version in self.removed.items() if version > since)
+        body = self._body(encoded, f', "since": {since}, "removed": {json.dumps(removed)}'.encode())
+        with self._lock:
+            self._changes[since] = body
+        return body
+
+
+class SnapshotStore:
+    """
+    Latest candle, MA9/MA20, spread and last signal per symbol/timeframe, published once
+    per scan cycle. Each publish builds a new Snapshot and swaps it in, so readers never
+    block the scanner or see a half-updated state.
+    'version' is the last cycle in which any record changed; it doubles as the ETag and
+    as the cursor for changes since a version.
+    """
+
+    def __init__(self):
+        self.cycle = 0
+        self.current = Snapshot(0, 0, None, {}, {}, {}, {})
+
+    def publish(self, records, labels=None):
+        """
+        Merges this cycle's 'records' ({label: record}) into a new snapshot. Labels missing
+        from 'labels' (the current watchlist) are removed. Returns the new snapshot.
+        """
+        self.cycle += 1
+        previous = self.current
+        merged = dict(previous.records)
+        encoded = dict(previous.encoded)
+        changed = dict(previous.changed)
+        removed = dict(previous.removed)
+
+        for label, record in records.items():
+            if merged.get(label) != record:
+                merged[label] = record
+                encoded[label] = json.dumps(dict(record, version=self.cycle)).encode()
+                changed[label] = self.cycle
+                removed.pop(label, None)
+
+        if labels is not None:
+            keep = set(labels)
+            for label in [label for label in merged if label not in keep]:
+                del merged[label], encoded[label], changed[label]
+                removed[label] = self.cycle
+
+        version = max(previous.version, max(changed.values(), default=0), max(removed.values(), default=0))
+        self.current = Snapshot(version, self.cycle, get_ist_time().isoformat(), merged, encoded, changed, removed)
+        metrics.set("snapshot_version", version)
+        metrics.set("snapshot_symbols", len(merged))
+        return self.current
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def snapshot_handler(store):
+    """
+    Request handler serving 'store':
+    - GET /snapshot: every record
+    - GET /changes?since=N: records changed after version N, plus removed labels
+    - GET /symbol?name=LABEL: one record
+    Responses carry an ETag (the snapshot version) and honour If-None-Match with 304.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, etag=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "no-cache")
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            snapshot = store.current
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            metrics.inc("snapshot_requests_total")
+
+            if url.path not in ("/snapshot", "/changes", "/symbol"):
+                self._send(404, b'{"error": "not found"}')
+                return
+            if etag_matches(self.headers.get("If-None-Match"), snapshot.etag):
+                metrics.inc("snapshot_not_modified_total")
+                self.send_response(304)
+                self.send_header("ETag", snapshot.etag)
+                self.end_headers()
+                return
+
+            if url.path == "/snapshot":
+                self._send(200, snapshot.body, snapshot.etag)
+            elif url.path == "/changes":
+                try:
+                    since = int(query.get("since", ["0"])[0])
+                except ValueError:
+                    self._send(400, b'{"error": "since must be a version number"}')
+                    return
+                self._send(200, snapshot.changes(since), snapshot.etag)
+            else:
+                data = snapshot.encoded.get(query.get("name", [""])[0])
+                if data is None:
+                    self._send(404, b'{"error": "unknown symbol"}')
+                    return
+                self._send(200, data, snapshot.etag)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
+
+
+def start_snapshot_server(store, port=0, socket_path=None, host="127.0.0.1"):
+    """
+    Serves 'store' over HTTP on host:port and/or a Unix socket at 'socket_path', from
+    daemon threads. Returns the started servers.
+    """
+    servers = []
+    if port:
+        servers.append(ThreadingHTTPServer((host, port), snapshot_handler(store)))
+        logger.info(f"Snapshot API listening on http://{host}:{servers[-1].server_address[1]}/snapshot")
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        servers.append(ThreadingUnixHTTPServer(socket_path, snapshot_handler(store)))
+        logger.info(f"Snapshot API listening on unix socket {socket_path}")
+
+    for server in servers:
+        threading.Thread(target=server.serve_forever, name="snapshot-server", daemon=True).start()
+    return servers
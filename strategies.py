@@ -0,0 +1,155 @@
+import numpy as np
+from indicators import calculate_sma, calculate_ema, calculate_rsi, detect_crossovers
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+# Indicator functions available to rules, keyed by the first element of a spec
+INDICATORS = {
+    "sma": calculate_sma,
+    "ema": calculate_ema,
+    "rsi": calculate_rsi,
+}
+
+
+def indicator_spec(spec):
+    """
+    Normalises an indicator spec to (kind, period, column); the column defaults to close.
+    e.g. ("sma", 20) -> ("sma", 20, "close")
+    """
+    kind, period = spec[0], spec[1]
+    column = spec[2] if len(spec) > 2 else "close"
+    return (kind, period, column)
+
+
+def spec_label(spec):
+    kind, period, column = spec
+    label = f"{kind.upper()}{period}"
+    return label if column == "close" else f"{label}({column})"
+
+
+class CrossoverRule:
+    """
+    Fires when the fast indicator crosses the slow one.
+    """
+
+    def __init__(self, name, fast, slow):
+        self.name = name
+        self.fast = indicator_spec(fast)
+        self.slow = indicator_spec(slow)
+
+    def indicators(self):
+        return [self.fast, self.slow]
+
+    def evaluate(self, values, df):
+        return detect_crossovers(values[self.fast], values[self.slow])
+
+    def describe(self, signal):
+        direction = "ABOVE" if signal == "BULLISH" else "BELOW"
+        return f"Signal: {spec_label(self.fast)} crossed {direction} {spec_label(self.slow)}"
+
+
+class ThresholdRule:
+    """
+    Fires when an oscillator recovers above 'lower' (bullish) or falls back below 'upper' (bearish),
+    e.g. RSI leaving oversold/overbought territory.
+    """
+
+    def __init__(self, name, indicator, lower, upper):
+        self.name = name
+        self.indicator = indicator_spec(indicator)
+        self.lower = lower
+        self.upper = upper
+
+    def indicators(self):
+        return [self.indicator]
+
+    def evaluate(self, values, df):
+        lower = np.full(len(df), self.lower, dtype=np.float64)
+        upper = np.full(len(df), self.upper, dtype=np.float64)
+        bullish, _ = detect_crossovers(values[self.indicator], lower)
+        _, bearish = detect_crossovers(values[self.indicator], upper)
+        return bullish, bearish
+
+    def describe(self, signal):
+        if signal == "BULLISH":
+            return f"Signal: {spec_label(self.indicator)} crossed ABOVE {self.lower}"
+        return f"Signal: {spec_label(self.indicator)} crossed BELOW {self.upper}"
+
+
+class VolumeSpikeRule:
+    """
+    Fires on a candle whose volume is at least 'multiple' times its moving average;
+    bullish on an up candle, bearish on a down candle.
+    """
+
+    def __init__(self, name, period, multiple):
+        self.name = name
+        self.average = indicator_spec(("sma", period, "volume"))
+        self.multiple = multiple
+
+    def indicators(self):
+        return [self.average]
+
+    def evaluate(self, values, df):
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        spike = volume >= self.multiple * values[self.average]
+        up = df['close'].to_numpy() >= df['open'].to_numpy()
+        return spike & up, spike & ~up
+
+    def describe(self, signal):
+        return f"Signal: Volume at {self.multiple}x its {spec_label(self.average)} on a {'green' if signal == 'BULLISH' else 'red'} candle"
+
+
+class StrategyEngine:
+    """
+    Evaluates a set of rules over one symbol's candles in a single vectorized pass.
+    Indicator specs are de-duplicated across rules, so e.g. SMA20 shared by three rules
+    is computed once.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.specs = list(dict.fromkeys(spec for rule in self.rules for spec in rule.indicators()))
+
+    def evaluate(self, df):
+        """
+        Returns {rule name: (bullish, bearish)} boolean arrays aligned with df's rows.
+        """
+        values = {
+            spec: INDICATORS[spec[0]](df[spec[2]].astype(float), spec[1]).to_numpy(dtype=np.float64)
+            for spec in self.specs
+        }
+        return {rule.name: rule.evaluate(values, df) for rule in self.rules}
+
+
+# Declarative strategy registry: rules are looked up by name (e.g. from Config.STRATEGIES)
+STRATEGY_REGISTRY = {}
+
+
+def register(rule):
+    STRATEGY_REGISTRY[rule.name] = rule
+    return rule
+
+
+register(CrossoverRule("ma9_ma20", ("sma", 9), ("sma", 20)))
+register(CrossoverRule("ma20_ma50", ("sma", 20), ("sma", 50)))
+register(CrossoverRule("ema9_ema21", ("ema", 9), ("ema", 21)))
+register(ThresholdRule("rsi14", ("rsi", 14), 30, 70))
+register(VolumeSpikeRule("volume_spike", 20, 3.0))
+
+
+def build_engine(names):
+    """
+    Builds an engine for the named registered rules. Unknown names are logged and skipped;
+    a rule named twice is registered once.
+    """
+    rules = []
+    for name in names:
+        rule = STRATEGY_REGISTRY.get(name.strip())
+        if rule is None:
+            logger.warning(f"Unknown strategy: {name}")
+            continue
+        if rule not in rules:
+            rules.append(rule)
+    return StrategyEngine(rules)
@@ -1,9 +1,16 @@
+import queue
+import threading
+import time
 import requests
 from config import Config
-from utils import get_logger
+from utils import get_logger, get_ist_time
+from metrics import metrics
 
 logger = get_logger(__name__)
 
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+
 def send_telegram_message(text):
     """
     Sends a message to the configured Telegram chat.
@@ -15,7 +22,7 @@ def send_telegram_message(text):
         logger.error("Telegram credentials missing. Cannot send alert.")
         return
 
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
+    url = f"{Config.TELEGRAM_API_URL}/bot{token}/sendMessage"
     payload = {
         "chat_id": chat_id,
         "text": text,
@@ -25,8 +32,233 @@ def send_telegram_message(text):
     try:
         response = requests.post(url, json=payload, timeout=10)
         if response.status_code == 200:
-            logger.info(f"Telegram alert sent: {text}")
+            logger.info("Telegram alert sent (%d chars)", len(text))
+            # Full text only when this module is at DEBUG (LOG_LEVELS=telegram_alerts=DEBUG)
+            logger.debug("Telegram alert text: %s", text)
         else:
             logger.error(f"Failed to send Telegram message: {response.text}")
     except Exception as e:
         logger.error(f"Error sending Telegram message: {e}")
+
+
+class AlertDispatcher:
+    """
+    Delivers Telegram alerts from a background thread so a slow send never blocks the scan.
+    Alerts go through a bounded queue and a keep-alive HTTP session. Alerts submitted with
+    the same group (e.g. the candle timestamp) within 'coalesce_seconds' are merged into
+    one digest message. A 429 response is retried after Telegram's `retry_after`.
+    Each alert's 'on_done' callback is told whether it was finally delivered, including
+    alerts still queued when the dispatcher is closed.
+    """
+
+    def __init__(self, max_queue=1000, coalesce_seconds=0.5, max_retries=5, timeout=10):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.coalesce_seconds = coalesce_seconds
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.metrics = {
+            "submitted": 0, "sent": 0, "failed": 0, "dropped": 0, "retries": 0,
+            "max_queue_depth": 0, "latency_total": 0.0, "latency_max": 0.0,
+            "detection_latency_last": 0.0, "detection_latency_max": 0.0,
+        }
+        self._lock = threading.Lock()
+        self._thread = None
+        # on_done callbacks of alerts submitted but not yet sent or given up on
+        self._pending = {}
+        self._next_id = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, text, group=None, candle_close=None, on_done=None):
+        """
+        Queues an alert without blocking. Returns False if the queue is full and it was dropped.
+        'candle_close' (IST, naive) is used to measure detection latency once the alert is delivered.
+        'on_done(delivered)' is called once the alert was sent or given up on (from the
+        dispatcher thread, or from close()); it is not called for an alert dropped here.
+        """
+        with self._lock:
+            alert_id = self._next_id
+            self._next_id += 1
+            if on_done is not None:
+                self._pending[alert_id] = on_done
+        try:
+            self.queue.put_nowait((text, group, time.monotonic(), candle_close, alert_id))
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(alert_id, None)
+                self.metrics["dropped"] += 1
+            logger.error("Alert queue full. Dropping alert.")
+            return False
+
+        with self._lock:
+            self.metrics["submitted"] += 1
+            self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.queue.qsize())
+        return True
+
+    def retry_budget(self):
+        """
+        Worst-case seconds one message can take: every attempt timing out plus the backoff
+        sleeps between them.
+        """
+        return self.max_retries * self.timeout + sum(2 ** attempt for attempt in range(self.max_retries - 1))
+
+    def close(self, timeout=None):
+        """
+        Flushes pending alerts and stops the worker thread. Waits up to 'timeout' seconds
+        (default: long enough for one message to exhaust its retries); alerts not sent by
+        then are given up on and their 'on_done' is called with False.
+        """
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join(self.coalesce_seconds + self.retry_budget() if timeout is None else timeout)
+        self._thread = None
+
+        with self._lock:
+            abandoned = list(self._pending)
+        if abandoned:
+            logger.error(f"Alert dispatcher closed with {len(abandoned)} alerts undelivered")
+            self._done(abandoned, False)
+        logger.info(f"Alert dispatcher stopped: {self.stats()}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+        delivered = stats["sent"] + stats["failed"]
+        stats["queue_depth"] = self.queue.qsize()
+        stats["latency_avg"] = stats.pop("latency_total") / delivered if delivered else 0.0
+        return stats
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            # Give the rest of this candle's alerts a moment to arrive, then merge them
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.coalesce_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    next_item = self.queue.get(timeout=max(remaining, 0)) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    stop = True
+                    break
+                batch.append(next_item)
+
+            for text, enqueued, candle_closes, alert_ids in self._coalesce(batch):
+                ok = self._send(text)
+                self._done(alert_ids, ok)
+                latency = time.monotonic() - enqueued
+                with self._lock:
+                    self.metrics["sent" if ok else "failed"] += 1
+                    self.metrics["latency_total"] += latency
+                    self.metrics["latency_max"] = max(self.metrics["latency_max"], latency)
+                if ok:
+                    self._record_detection_latency(candle_closes)
+
+            if stop:
+                return
+
+    def _done(self, alert_ids, delivered):
+        # Each callback runs once: whichever of the worker and close() gets there first
+        with self._lock:
+            callbacks = [self._pending.pop(alert_id, None) for alert_id in alert_ids]
+        for on_done in callbacks:
+            if on_done is None:
+                continue
+            try:
+                on_done(delivered)
+            except Exception as e:
+                logger.error(f"Alert delivery callback failed: {e}")
+
+    def _record_detection_latency(self, candle_closes):
+        # Detection latency: alert delivery time minus the close of the candle that triggered it
+        now = get_ist_time().replace(tzinfo=None)
+        for candle_close in candle_closes:
+            if candle_close is None:
+                continue
+            latency = (now - candle_close).total_seconds()
+            metrics.record("alert_detection_latency_seconds", latency)
+            with self._lock:
+                self.metrics["detection_latency_last"] = latency
+                self.metrics["detection_latency_max"] = max(self.metrics["detection_latency_max"], latency)
+            logger.info(f"Detection latency {latency:.1f}s for candle closing at {candle_close}")
+
+    def _coalesce(self, batch):
+        """
+        Merges alerts that share a group into digest messages no longer than Telegram allows.
+        Yields (text, earliest enqueue time, candle closes, alert ids) tuples.
+        """
+        groups = {}
+        for text, group, enqueued, candle_close, alert_id in batch:
+            key = group if group is not None else object()
+            groups.setdefault(key, []).append((text, enqueued, candle_close, alert_id))
+
+        for key, items in groups.items():
+            if len(items) == 1:
+                text, enqueued, candle_close, alert_id = items[0]
+                yield text, enqueued, [candle_close], [alert_id]
+                continue
+
+            header = f"📊 **{len(items)} CROSSOVERS on {key} candle**\n\n"
+            digest, enqueued, candle_closes, alert_ids = header, None, [], []
+            for text, item_enqueued, candle_close, alert_id in items:
+                if len(digest) + len(text) + 2 > MAX_MESSAGE_LENGTH and digest != header:
+                    yield digest, enqueued, candle_closes, alert_ids
+                    digest, enqueued, candle_closes, alert_ids = header, None, [], []
+                digest += text + "\n"
+                enqueued = item_enqueued if enqueued is None else min(enqueued, item_enqueued)
+                candle_closes.append(candle_close)
+                alert_ids.append(alert_id)
+            yield digest, enqueued, candle_closes, alert_ids
+
+    def _send(self, text):
+        token = Config.TELEGRAM_BOT_TOKEN
+        chat_id = Config.TELEGRAM_CHAT_ID
+        
+        if not token or not chat_id:
+            logger.error("Telegram credentials missing. Cannot send alert.")
+            return False
+
+        url = f"{Config.TELEGRAM_API_URL}/bot{token}/sendMessage"
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "Markdown"
+        }
+
+        for attempt in range(self.max_retries):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    logger.info("Telegram alert sent.")
+                    return True
+                if response.status_code == 429:
+                    # Flood control: Telegram says exactly how long to back off
+                    retry_after = response.json().get("parameters", {}).get("retry_after", 2 ** attempt)
+                    logger.warning(f"Telegram flood limit hit. Retrying in {retry_after}s... (Attempt {attempt + 1}/{self.max_retries})")
+                    with self._lock:
+                        self.metrics["retries"] += 1
+                    time.sleep(retry_after)
+                    continue
+                logger.error(f"Failed to send Telegram message: {response.text}")
+                return False
+            except Exception as e:
+                logger.warning(f"Error sending Telegram message: {e} (Attempt {attempt + 1}/{self.max_retries})")
+                if attempt + 1 < self.max_retries:
+                    with self._lock:
+                        self.metrics["retries"] += 1
+                    time.sleep(2 ** attempt)
+
+        logger.error(f"Giving up on Telegram message after {self.max_retries} attempts")
+        return False
@@ -0,0 +1,87 @@
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class TelegramStub:
+    """
+    Local stand-in for the Telegram Bot API `sendMessage` endpoint.
+    Records every message and can simulate flood control by answering every
+    'flood_every'-th request with a 429 and a `retry_after`.
+    Point Config.TELEGRAM_API_URL (TELEGRAM_API_URL env var) at `url` to use it.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, flood_every=0, retry_after=1, delay=0.0):
+        self.messages = []
+        self.requests = 0
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.delay = delay
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                with stub._lock:
+                    stub.requests += 1
+                    flooded = stub.flood_every and stub.requests % stub.flood_every == 0
+                    if not flooded and self.path.endswith("/sendMessage"):
+                        stub.messages.append(payload)
+
+                if stub.delay:
+                    threading.Event().wait(stub.delay)
+
+                if flooded:
+                    status, body = 429, {
+                        "ok": False, "error_code": 429,
+                        "description": f"Too Many Requests: retry after {stub.retry_after}",
+                        "parameters": {"retry_after": stub.retry_after},
+                    }
+                else:
+                    status, body = 200, {"ok": True, "result": {"message_id": len(stub.messages)}}
+
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Telegram Bot API stub")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--flood-every", type=int, default=0, help="Answer every Nth request with HTTP 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    stub = TelegramStub(port=args.port, flood_every=args.flood_every, retry_after=args.retry_after)
+    print(f"Telegram stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        for message in stub.messages:
+            print(message.get("text"))
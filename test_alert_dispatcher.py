@@ -0,0 +1,65 @@
+import socket
+import time
+import pytest
+from config import Config
+from telegram_alerts import AlertDispatcher
+from telegram_stub import TelegramStub
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    stub = TelegramStub().start()
+    monkeypatch.setattr(Config, "TELEGRAM_API_URL", stub.url)
+    monkeypatch.setattr(Config, "TELEGRAM_BOT_TOKEN", "test")
+    monkeypatch.setattr(Config, "TELEGRAM_CHAT_ID", "test")
+    yield stub
+    stub.stop()
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_on_done_reports_delivery(telegram):
+    results = []
+    dispatcher = AlertDispatcher(coalesce_seconds=0).start()
+    assert dispatcher.submit("alert", on_done=results.append)
+    dispatcher.close()
+    assert results == [True]
+    assert len(telegram.messages) == 1
+
+
+def test_on_done_reports_exhausted_retries(telegram, monkeypatch):
+    monkeypatch.setattr(Config, "TELEGRAM_API_URL", closed_port_url())
+    results = []
+    dispatcher = AlertDispatcher(coalesce_seconds=0, max_retries=2, timeout=1).start()
+    dispatcher.submit("a", group=1, on_done=results.append)
+    dispatcher.submit("b", group=1, on_done=results.append)
+    dispatcher.close()
+    assert results == [False, False]
+
+
+def test_close_gives_up_on_unsent_alerts_once(telegram):
+    telegram.delay = 0.5
+    results = []
+    dispatcher = AlertDispatcher(coalesce_seconds=0).start()
+    for group in range(3):
+        dispatcher.submit(f"alert {group}", group=group, on_done=results.append)
+    dispatcher.close(timeout=0.1)
+    assert results == [False, False, False]
+
+    # The sends still in flight finishing later must not report again
+    telegram.delay = 0
+    deadline = time.monotonic() + 5
+    while len(telegram.messages) < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(telegram.messages) == 3
+    assert results == [False, False, False]
+
+
+def test_default_close_timeout_covers_the_retries():
+    dispatcher = AlertDispatcher(max_retries=5, timeout=10)
+    # 5 attempts of 10s plus 1 + 2 + 4 + 8 s of backoff
+    assert dispatcher.retry_budget() == 65
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+from alert_store import AlertStore
+
+KEY = ("NSE:SBIN", "BULLISH", "2026-10-19 10:00:00")
+
+
+def test_unconfirmed_claims_are_dropped_on_reopen(tmp_path):
+    path = str(tmp_path / "alerts.sqlite3")
+    store = AlertStore(path)
+    assert store.claim(*KEY)
+    assert not store.claim(*KEY)
+    # Killed before delivery: the next process may alert again
+    store.close()
+
+    store = AlertStore(path)
+    assert not store.seen(*KEY)
+    assert store.claim(*KEY)
+    store.confirm(*KEY)
+    store.close()
+
+    store = AlertStore(path)
+    assert store.seen(*KEY)
+    assert not store.claim(*KEY)
+
+
+def test_release_forgets_a_claim(tmp_path):
+    store = AlertStore(str(tmp_path / "alerts.sqlite3"))
+    store.claim(*KEY)
+    store.release(*KEY)
+    assert not store.seen(*KEY)
+    assert store.claim(*KEY)
+
+
+def test_alerts_from_older_stores_count_as_delivered(tmp_path):
+    path = str(tmp_path / "alerts.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE alerts (symbol TEXT NOT NULL, direction TEXT NOT NULL, candle_ts TEXT NOT NULL,"
+        " sent_at REAL NOT NULL, PRIMARY KEY (symbol, direction, candle_ts)) WITHOUT ROWID"
+    )
+    conn.execute("INSERT INTO alerts VALUES (?, ?, ?, ?)", KEY + (time.time(),))
+    conn.commit()
+    conn.close()
+
+    store = AlertStore(path)
+    assert store.seen(*KEY)
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from candle_archive import CandleArchive, _backfill_month
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+class FakeClient:
+    """
+    Serves flat 5-minute candles for any range, except chunks starting in 'fail'.
+    """
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+
+    def get_candles(self, token, exchange, interval, from_date, to_date):
+        if from_date in self.fail:
+            return None
+        timestamps = pd.date_range(from_date, to_date, freq="5min")
+        ones = np.ones(len(timestamps))
+        return pd.DataFrame({"timestamp": timestamps, "open": ones, "high": ones, "low": ones, "close": ones, "volume": ones})
+
+
+def test_month_with_a_failed_chunk_is_not_covered(tmp_path):
+    archive = CandleArchive(str(tmp_path), "ONE_MINUTE")
+    month = datetime(2026, 9, 1)
+    _backfill_month(FakeClient(fail={month}), archive, "1", "NSE", month, NOW)
+    assert not archive.covers("1", "NSE", month, datetime(2026, 9, 30), now=NOW)
+
+    _backfill_month(FakeClient(), archive, "1", "NSE", month, NOW)
+    assert archive.complete_months("1", "NSE") == {"2026-09"}
+    assert archive.covers("1", "NSE", month, datetime(2026, 10, 1), now=NOW)
+
+
+def test_current_month_is_covered_only_up_to_its_last_fetch(tmp_path):
+    archive = CandleArchive(str(tmp_path), "ONE_MINUTE")
+    month = datetime(2026, 10, 1)
+    _backfill_month(FakeClient(), archive, "1", "NSE", month, NOW)
+    assert archive.covers("1", "NSE", month, datetime(2026, 10, 19), now=NOW)
+    assert not archive.covers("1", "NSE", month, datetime(2026, 10, 19), now=NOW + timedelta(hours=2))
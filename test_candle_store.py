@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import numpy as np
+from candle_frame import CandleFrame
+from candle_store import CandleStore
+
+START = datetime(2026, 10, 16, 9, 15)
+
+
+class FrameClient:
+    """
+    Serves 5-minute candles up to 'now' as CandleFrames; the close of the bar at
+    minute m is m, plus 'revision' so a re-fetched bar can be told apart.
+    """
+
+    def __init__(self):
+        self.now = START
+        self.revision = 0.0
+        self.requests = []
+
+    def get_candles(self, token, exchange, interval, days=5, from_date=None, as_frame=False):
+        assert as_frame
+        self.requests.append(from_date)
+        start = from_date or START
+        rows = []
+        t = start
+        while t < self.now:
+            close = (t - START).total_seconds() / 60 + self.revision
+            rows.append([t.strftime("%Y-%m-%dT%H:%M:%S+05:30"), close, close, close, close, 100])
+            t += timedelta(minutes=5)
+        return CandleFrame.from_payload(rows)
+
+
+def test_update_merges_incremental_fetches_and_drops_forming_candles(tmp_path):
+    client = FrameClient()
+    store = CandleStore(str(tmp_path))
+
+    client.now = START + timedelta(minutes=22)
+    df = store.update(client, "1", now=client.now)
+    # 09:35 is still forming at 09:37
+    assert df["timestamp"].iloc[-1] == START + timedelta(minutes=15)
+    assert client.requests == [None]
+
+    client.now = START + timedelta(minutes=31)
+    client.revision = 0.5
+    df = store.update(client, "1", now=client.now)
+    assert client.requests[-1] == START + timedelta(minutes=15)
+    assert df["timestamp"].is_unique and df["timestamp"].is_monotonic_increasing
+    assert df["timestamp"].iloc[-1] == START + timedelta(minutes=25)
+    # The re-fetched overlap row replaces the stored one
+    np.testing.assert_array_equal(df["close"], [0, 5, 10, 15.5, 20.5, 25.5])
+
+    reloaded = CandleStore(str(tmp_path)).get("1")
+    assert reloaded.equals(df)
+
+
+def test_append_keeps_the_latest_candle_per_timestamp(tmp_path):
+    store = CandleStore(str(tmp_path), max_candles=2)
+    for minute, close in [(0, 1.0), (5, 2.0), (5, 3.0), (10, 4.0)]:
+        candle = {"timestamp": START + timedelta(minutes=minute), "open": close, "high": close, "low": close, "close": close, "volume": 1.0}
+        df = store.append("1", "NSE", candle)
+    np.testing.assert_array_equal(df["close"], [3.0, 4.0])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import CrossoverState, detect_crossovers
+from universe_matrix import UniverseMatrix
+
+BAR_NS = 300 * 10**9
+BARS = 228
+NEW_BARS = 100
+
+
+def random_walk(seed):
+    """
+    Tick-rounded (0.05) random walk.
+    """
+    rng = np.random.default_rng(seed)
+    return np.round((1000 + rng.normal(0, 1, BARS).cumsum()) / 0.05) * 0.05
+
+
+def tied(seed):
+    """
+    Flat runs on a three-price grid, so MA9 == MA20 on many bars.
+    """
+    rng = np.random.default_rng(seed)
+    return np.repeat(rng.choice([100.0, 100.05, 100.1], BARS), rng.integers(1, 12, BARS))[:BARS]
+
+
+SERIES = [random_walk(seed) for seed in range(5)] + [tied(seed) for seed in range(5)] + [np.full(BARS, 250.35)]
+
+
+def reference(closes):
+    """
+    The pandas definition: rolling means, and a cross where the previous bar is on or
+    below (above) and the current one strictly above (below).
+    """
+    series = pd.Series(closes)
+    ma9 = series.rolling(window=9).mean()
+    ma20 = series.rolling(window=20).mean()
+    bullish = (ma9.shift() <= ma20.shift()) & (ma9 > ma20)
+    bearish = (ma9.shift() >= ma20.shift()) & (ma9 < ma20)
+    return ma9, ma20, bullish.to_numpy(), bearish.to_numpy()
+
+
+def test_tied_series_actually_tie():
+    ma9, ma20, bullish, _ = reference(SERIES[5])
+    assert (ma9 == ma20).sum() > 0 and bullish.any()
+
+
+@pytest.mark.parametrize("closes", SERIES)
+def test_crossover_state_matches_pandas(closes):
+    ma9, ma20, bullish, bearish = reference(closes)
+    state = CrossoverState(9, 20)
+    results = [state.update(close) for close in closes]
+
+    np.testing.assert_array_equal([r[0] for r in results], ma9)
+    np.testing.assert_array_equal([r[1] for r in results], ma20)
+    np.testing.assert_array_equal([r[2] == "BULLISH" for r in results], bullish)
+    np.testing.assert_array_equal([r[2] == "BEARISH" for r in results], bearish)
+
+
+@pytest.mark.parametrize("closes", SERIES)
+def test_detect_crossovers_matches_pandas(closes):
+    ma9, ma20, bullish, bearish = reference(closes)
+    got_bullish, got_bearish = detect_crossovers(ma9, ma20)
+    np.testing.assert_array_equal(got_bullish, bullish)
+    np.testing.assert_array_equal(got_bearish, bearish)
+
+
+def test_universe_matrix_matches_pandas():
+    labels = [str(i) for i in range(len(SERIES))]
+    matrix = UniverseMatrix(labels, window=128)
+    timestamps = np.arange(1, BARS + 1) * BAR_NS
+    warm = BARS - NEW_BARS
+
+    # Warm every row, then scan the last NEW_BARS bars of all rows in one pass
+    for label, closes in zip(labels, SERIES):
+        matrix.append(label, timestamps[:warm], closes[:warm])
+    matrix.crossovers()
+    matrix.mark_scanned()
+    for label, closes in zip(labels, SERIES):
+        matrix.append(label, timestamps, closes)
+    bullish, bearish, alert_bars = matrix.crossovers()
+
+    assert (alert_bars == NEW_BARS).all()
+    for row, closes in enumerate(SERIES):
+        _, _, ref_bullish, ref_bearish = reference(closes)
+        np.testing.assert_array_equal(bullish[row], ref_bullish[-NEW_BARS:])
+        np.testing.assert_array_equal(bearish[row], ref_bearish[-NEW_BARS:])
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from poll_scheduler import PollScheduler
+from universe_matrix import UniverseMatrix
+
+BARS = 75
+WARM = 30
+SESSION_OPEN = np.datetime64("2026-10-16T09:15", "ns")
+BAR = np.timedelta64(5, "m")
+
+
+def jumpy(rng):
+    """
+    Tick-rounded random walk with 3% jumps on ~5% of bars, far beyond the volatility bound.
+    """
+    steps = rng.normal(0, 0.002, BARS)
+    jumps = rng.random(BARS) < 0.05
+    steps[jumps] += rng.choice([-1, 1], jumps.sum()) * 0.03
+    return np.round(500 * np.exp(np.cumsum(steps)) / 0.05) * 0.05
+
+
+def steady(rng):
+    """
+    Steps of exactly +-0.5, so every move stays within the volatility bound.
+    """
+    return 500 + np.cumsum(rng.choice([-1, 1], BARS) * 0.5)
+
+
+def reference_crossovers(closes):
+    series = pd.Series(closes)
+    ma9 = series.rolling(window=9).mean()
+    ma20 = series.rolling(window=20).mean()
+    crossed = ((ma9.shift() <= ma20.shift()) & (ma9 > ma20)) | ((ma9.shift() >= ma20.shift()) & (ma9 < ma20))
+    return set(np.flatnonzero(crossed.to_numpy()))
+
+
+def replay(closes, max_bars):
+    """
+    Runs the scan loop bar by bar: the scheduler picks the due symbols, their bars so far
+    are appended to the matrix and its crossovers recorded. Returns
+    {(row, crossover bar): bar at whose close it was detected} and the number of polls.
+    """
+    labels = [str(row) for row in range(len(closes))]
+    starts = SESSION_OPEN + np.arange(BARS) * BAR
+    matrix = UniverseMatrix(labels, window=128)
+    scheduler = PollScheduler(max_bars)
+    detected = {}
+    polls = 0
+
+    for k in range(WARM, BARS):
+        now = (starts[k] + BAR).astype("datetime64[s]").astype(object)
+        due = scheduler.due({label: {} for label in labels}, now)
+        rows = [matrix.index[label] for label in due]
+        for label, row in zip(due, rows):
+            matrix.append(label, starts[:k + 1], closes[row, :k + 1])
+        polls += len(rows)
+
+        # Warm-up rows (first scan) never alert, like a fresh start with depth 0
+        bullish, bearish, _ = matrix.crossovers(fresh_depth=0)
+        depth = bullish.shape[1]
+        for row, j in zip(*np.nonzero(bullish | bearish)):
+            detected[(row, k - (depth - 1 - j))] = k
+        matrix.mark_scanned()
+
+        if rows:
+            scheduler.update(list(due), matrix.closes[rows][:, None, -21:], matrix.timestamps[rows, -1:].view("datetime64[ns]"), [5])
+    return detected, polls
+
+
+def expected(closes):
+    return {(row, k) for row in range(len(closes)) for k in reference_crossovers(closes[row]) if k > WARM}
+
+
+@pytest.mark.parametrize("max_bars", [3, 6, 12])
+def test_no_crossover_is_missed_on_large_jumps(max_bars):
+    rng = np.random.default_rng(1)
+    closes = np.array([jumpy(rng) for _ in range(100)])
+    detected, polls = replay(closes, max_bars)
+
+    assert set(detected) == expected(closes)
+    # A jump beyond the bound can delay an alert to the symbol's next poll, never further
+    assert max(found - bar for (_, bar), found in detected.items()) <= max_bars - 1
+    assert polls < closes.shape[0] * (BARS - WARM)
+
+
+@pytest.mark.parametrize("max_bars", [3, 6, 12])
+def test_crossovers_within_the_volatility_bound_fall_on_polled_bars(max_bars):
+    rng = np.random.default_rng(2)
+    closes = np.array([steady(rng) for _ in range(100)])
+    detected, polls = replay(closes, max_bars)
+
+    assert set(detected) == expected(closes)
+    assert all(found == bar for (_, bar), found in detected.items())
+    assert polls < closes.shape[0] * (BARS - WARM)
@@ -0,0 +1,147 @@
+import threading
+from rate_limiter import RateLimiter
+from scanner import ScanEngine
+from smartapi_client import SmartApiClient
+
+
+class FakeClock:
+    """
+    Virtual monotonic clock: sleeping advances time instantly instead of blocking.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+            # Like a real sleep, never shorter than the timer resolution; a tiny float
+            # wait would otherwise vanish when added to 'now' and the caller would spin
+            self.now += max(seconds, 1e-6)
+
+
+def test_bucket_refills_at_the_rate_up_to_the_burst():
+    clock = FakeClock()
+    limiter = RateLimiter(2, burst=5, clock=clock.monotonic, sleep=clock.sleep)
+
+    # The full burst goes out at once
+    for _ in range(5):
+        limiter.acquire()
+    assert clock.now == 0.0
+
+    # Then one request per 1/rate seconds
+    limiter.acquire()
+    assert clock.sleeps == [0.5]
+    assert clock.now == 0.5
+
+    # An idle minute refills only up to the burst
+    clock.now += 60
+    clock.sleeps.clear()
+    for _ in range(5):
+        limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    assert clock.sleeps == [0.5]
+
+
+def test_backoff_pauses_the_bucket_and_drains_it():
+    clock = FakeClock()
+    limiter = RateLimiter(2, burst=5, clock=clock.monotonic, sleep=clock.sleep)
+
+    limiter.backoff(4)
+    limiter.acquire()
+    # Waits out the pause, then resumes at the base rate rather than with a full burst
+    assert clock.now == 4.5
+    limiter.acquire()
+    assert clock.now == 5.0
+
+
+class ThrottleOnce:
+    """
+    SmartAPI stand-in whose first getCandleData call is throttled (AB1004). Requests
+    already in flight are held until the client has applied the shared backoff.
+    """
+
+    def __init__(self, backed_off):
+        self.backed_off = backed_off
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def getCandleData(self, params):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            return {"status": False, "errorcode": "AB1004", "message": "Too many requests"}
+        assert self.backed_off.wait(10)
+        return {"status": True, "data": [["2026-10-19T09:15:00+05:30", 100, 101, 99, 100, 1000]]}
+
+
+class StaticSession:
+    def __init__(self, smart_api):
+        self.smart_api = smart_api
+        self.tokens = {"jwtToken": "jwt"}
+
+    def get(self):
+        return self.smart_api
+
+    def invalidate(self):
+        pass
+
+
+class FetchOnly:
+    """
+    CandleStore stand-in that only fetches, keeping the test off the disk.
+    """
+
+    def update(self, client, token, exchange):
+        return client.get_candles(token, exchange)
+
+
+def test_one_throttled_response_pauses_every_worker():
+    workers = 4
+    clock = FakeClock()
+    limiter = RateLimiter(100, clock=clock.monotonic, sleep=clock.sleep)
+    backed_off = threading.Event()
+    after_backoff = threading.Barrier(workers)
+    acquired = []
+    parked = set()
+
+    backoff = limiter.backoff
+
+    def recorded_backoff(seconds):
+        backoff(seconds)
+        backed_off.set()
+
+    acquire = limiter.acquire
+
+    def recorded_acquire():
+        if backed_off.is_set() and threading.get_ident() not in parked:
+            # Line every worker up behind the throttle before any of them asks for a slot
+            parked.add(threading.get_ident())
+            after_backoff.wait(10)
+            acquire()
+            acquired.append((threading.get_ident(), clock.monotonic()))
+        else:
+            acquire()
+
+    limiter.backoff = recorded_backoff
+    limiter.acquire = recorded_acquire
+
+    client = SmartApiClient(rate_limiter=limiter, session_manager=StaticSession(ThrottleOnce(backed_off)))
+    client.login()
+    engine = ScanEngine(client, FetchOnly(), max_workers=workers)
+    symbols = {f"SYM{i}": {"token": str(i), "exchange": "NSE"} for i in range(3 * workers)}
+
+    results = {name: future.result() for name, future in engine.fetch_all(symbols)}
+
+    assert all(len(df) == 1 for df in results.values())
+    # The first retry waits 1s (2 ** 0); no worker gets a slot before the pause ends
+    assert len({thread for thread, _ in acquired}) == workers
+    assert all(now >= 1.0 for _, now in acquired)
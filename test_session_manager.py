@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from session_manager import SessionManager
+from smartapi_stub import SmartApiStub
+
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+
+TOTP_SECRET = "JBSWY3DPEHPK3PXP"
+
+# Another process on the host: prints the JWT its manager ends up using
+OTHER_PROCESS = """
+import sys
+from session_manager import SessionManager
+manager = SessionManager("test", "TEST", "0000", sys.argv[3], sys.argv[1], root=sys.argv[2])
+print("JWT", manager.get() is not None and manager.tokens["jwtToken"])
+"""
+
+
+def make_manager(stub, cache_path):
+    return SessionManager("test", "TEST", "0000", TOTP_SECRET, str(cache_path), root=stub.url)
+
+
+def cached_jwt(cache_path):
+    with open(cache_path) as f:
+        return json.load(f)["jwtToken"]
+
+
+def test_cached_session_is_reused_across_processes(tmp_path):
+    stub = SmartApiStub().start()
+    try:
+        cache_path = tmp_path / "session.json"
+        manager = make_manager(stub, cache_path)
+        assert manager.get() is not None
+        assert stub.logins == 1
+
+        env = dict(os.environ, PYTHONPATH=repo_dir, LOG_LEVEL="WARNING")
+        proc = subprocess.run(
+            [sys.executable, "-c", OTHER_PROCESS, str(cache_path), stub.url, TOTP_SECRET],
+            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60,
+        )
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        jwt = [line for line in proc.stdout.splitlines() if line.startswith("JWT ")][-1].split(" ", 1)[1]
+
+        assert jwt == manager.tokens["jwtToken"]
+        assert stub.logins == 1
+        assert stub.refreshes == 0
+    finally:
+        stub.stop()
+
+
+def test_session_is_refreshed_ahead_of_expiry(tmp_path, monkeypatch):
+    stub = SmartApiStub(session_ttl=6 * 3600).start()
+    real_time = time.time
+    offset = [0.0]
+    # The stub stamps `exp` with the same clock, so both sides move forward together
+    monkeypatch.setattr(time, "time", lambda: real_time() + offset[0])
+    try:
+        cache_path = tmp_path / "session.json"
+        manager = make_manager(stub, cache_path)
+        manager.get()
+        first_jwt = manager.tokens["jwtToken"]
+
+        # Still outside the 30-minute refresh margin: the session is used as is
+        offset[0] = 5 * 3600
+        manager.get()
+        assert manager.tokens["jwtToken"] == first_jwt
+        assert stub.refreshes == 0
+
+        # Inside the margin but before expiry: renewed with the refresh token, no TOTP login
+        offset[0] = 5.75 * 3600
+        smart_api = manager.get()
+        assert stub.refreshes == 1
+        assert stub.logins == 1
+        assert manager.tokens["jwtToken"] != first_jwt
+        assert cached_jwt(cache_path) == manager.tokens["jwtToken"]
+        assert smart_api.getProfile(manager.tokens["refreshToken"])["status"] is True
+
+        # The renewed session is fresh again
+        manager.get()
+        assert stub.refreshes == 1
+    finally:
+        stub.stop()
+
+
+def test_invalidate_falls_back_to_login_when_the_refresh_fails(tmp_path, caplog):
+    stub = SmartApiStub().start()
+    try:
+        cache_path = tmp_path / "session.json"
+        manager = make_manager(stub, cache_path)
+        manager.get()
+
+        # An invalidated session is renewed with the refresh token first
+        manager.invalidate()
+        manager.get()
+        assert (stub.logins, stub.refreshes) == (1, 1)
+
+        # Once the server has dropped the session the refresh is rejected, so a full login follows
+        stub.revoke()
+        manager.invalidate()
+        smart_api = manager.get()
+        assert smart_api is not None
+        assert "Error refreshing SmartAPI session" in caplog.text
+        assert (stub.logins, stub.refreshes) == (2, 1)
+        assert cached_jwt(cache_path) == manager.tokens["jwtToken"]
+        assert smart_api.getProfile(manager.tokens["refreshToken"])["status"] is True
+
+        # The other processes pick up the new session from the cache rather than logging in
+        assert make_manager(stub, cache_path).get() is not None
+        assert stub.logins == 2
+    finally:
+        stub.stop()
@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from smartapi_stub import SmartApiStub
+from telegram_stub import TelegramStub
+
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter, so the coordinator and its spawned workers read the same
+# configuration from the environment
+SCAN = """
+import sys
+import main, test_sharded_scan
+test_sharded_scan.freeze_clock()
+main.SYMBOLS_MAP.clear()
+main.SYMBOLS_MAP.update({f"NSE:STUB{i}": {"token": str(200000 + i), "exchange": "NSE"} for i in range(40)})
+main.alert_dispatcher.start()
+if sys.argv[1] == "sharded":
+    main.run_worker = test_sharded_scan.open_market_worker
+    main.run_sharded(2, once=True)
+else:
+    client = main.SmartApiClient()
+    assert client.login()
+    main.job(client)
+main.alert_dispatcher.close()
+"""
+
+
+def freeze_clock():
+    """
+    Pins "now" to just after a past session close (and treats the market as open), so
+    every run fetches and confirms exactly the same synthetic candles.
+    """
+    from datetime import datetime
+    import pytz
+    import candle_archive, candle_store, main, smartapi_client
+
+    now = pytz.timezone("Asia/Kolkata").localize(datetime(2026, 10, 16, 15, 31))
+    for module in (candle_archive, candle_store, main, smartapi_client):
+        module.get_ist_time = lambda: now
+    main.is_market_open = lambda: True
+
+
+def open_market_worker(*args):
+    """
+    Worker entry point for the test: runs main.run_worker with the frozen clock.
+    """
+    import main
+    freeze_clock()
+    main.run_worker(*args)
+
+
+def run_scan(mode, workdir, api_stub, telegram_stub):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": repo_dir,
+        "SMARTAPI_ROOT_URL": api_stub.url,
+        "SMARTAPI_API_KEY": "test", "SMARTAPI_CLIENT_ID": "TEST", "SMARTAPI_MPIN": "0000",
+        "SMARTAPI_TOTP_SECRET": "JBSWY3DPEHPK3PXP",
+        "SESSION_CACHE_PATH": os.path.join(workdir, "session.json"),
+        "TELEGRAM_API_URL": telegram_stub.url, "TELEGRAM_BOT_TOKEN": "test", "TELEGRAM_CHAT_ID": "test",
+        "ALERT_DB_PATH": os.path.join(workdir, "alerts.sqlite3"),
+        "CANDLE_CACHE_DIR": os.path.join(workdir, "candles"),
+        "ARCHIVE_DIR": os.path.join(workdir, "archive"),
+        "SCAN_PROCESSES": "0", "SCAN_PROCESS_TIMEOUT": "60",
+        "LOG_LEVEL": "WARNING",
+    })
+    os.makedirs(workdir)
+    proc = subprocess.run([sys.executable, "-c", SCAN, mode], cwd=workdir, env=env, capture_output=True, text=True, timeout=180)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    conn = sqlite3.connect(os.path.join(workdir, "alerts.sqlite3"))
+    alerts = conn.execute("SELECT symbol, direction, candle_ts, delivered FROM alerts").fetchall()
+    conn.close()
+    return alerts
+
+
+def test_sharded_scan_matches_single_process(tmp_path):
+    api_stub = SmartApiStub().start()
+    telegram_stub = TelegramStub().start()
+    try:
+        single = run_scan("single", str(tmp_path / "single"), api_stub, telegram_stub)
+        single_messages = len(telegram_stub.messages)
+        logins = api_stub.logins
+        sharded = run_scan("sharded", str(tmp_path / "sharded"), api_stub, telegram_stub)
+    finally:
+        api_stub.stop()
+        telegram_stub.stop()
+
+    assert len(single) >= 3, "the synthetic candles should cross on some of the last bars"
+    assert sorted(sharded) == sorted(single)
+    assert all(delivered == 1 for *_, delivered in sharded)
+    # The workers share one account, so the second reuses the first one's cached session
+    assert api_stub.logins - logins == 1
+    assert len(telegram_stub.messages) > single_messages
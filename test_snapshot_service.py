@@ -0,0 +1,101 @@
+import http.client
+import json
+import socket
+import pytest
+from snapshot_service import SnapshotStore, start_snapshot_server
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def record(close):
+    return {"symbol": "NSE:SBIN", "timeframe": 5, "candle": {"close": close}, "ma9": None, "ma20": None}
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def service(request, tmp_path):
+    """
+    (store, connect) with the store served over a TCP port or a Unix socket.
+    """
+    store = SnapshotStore()
+    if request.param == "tcp":
+        port = free_port()
+        servers = start_snapshot_server(store, port=port)
+        connect = lambda: http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    else:
+        path = str(tmp_path / "snapshot.sock")
+        servers = start_snapshot_server(store, socket_path=path)
+        connect = lambda: UnixHTTPConnection(path)
+    yield store, connect
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def get(connect, path, headers=None):
+    conn = connect()
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, response.getheader("ETag"), json.loads(body) if body else None
+
+
+def test_matching_etag_gets_304(service):
+    store, connect = service
+    store.publish({"A": record(1.0)})
+    status, etag, body = get(connect, "/snapshot")
+    assert status == 200 and body["symbols"]["A"]["candle"]["close"] == 1.0
+
+    assert get(connect, "/snapshot", {"If-None-Match": etag})[0] == 304
+    # An unchanged cycle keeps the version, so the ETag still matches
+    store.publish({"A": record(1.0)})
+    assert get(connect, "/snapshot", {"If-None-Match": etag})[0] == 304
+
+    store.publish({"A": record(2.0)})
+    status, new_etag, _ = get(connect, "/snapshot", {"If-None-Match": etag})
+    assert status == 200 and new_etag != etag
+
+
+def test_changes_returns_only_newer_records(service):
+    store, connect = service
+    store.publish({"A": record(1.0), "B": record(1.0)})
+    version = store.current.version
+    store.publish({"A": record(1.0), "B": record(2.0)})
+
+    status, _, body = get(connect, f"/changes?since={version}")
+    assert status == 200
+    assert list(body["symbols"]) == ["B"]
+    assert body["symbols"]["B"]["version"] == store.current.version
+    assert body["since"] == version and body["removed"] == []
+
+    _, _, body = get(connect, f"/changes?since={store.current.version}")
+    assert body["symbols"] == {}
+    assert get(connect, "/changes?since=x")[0] == 400
+
+
+def test_removed_labels_disappear(service):
+    store, connect = service
+    store.publish({"A": record(1.0), "B": record(1.0)})
+    version = store.current.version
+    store.publish({}, labels=["A"])
+
+    _, _, body = get(connect, "/snapshot")
+    assert list(body["symbols"]) == ["A"]
+    _, _, body = get(connect, f"/changes?since={version}")
+    assert body["removed"] == ["B"]
+    assert get(connect, "/symbol?name=B")[0] == 404
+    assert get(connect, "/symbol?name=A")[0] == 200
@@ -0,0 +1,74 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from tick_stream import CandleAggregator
+
+DAY = datetime(2026, 10, 19)
+
+
+def stream(interval_minutes, times):
+    bars = []
+    aggregator = CandleAggregator(lambda token, bar: bars.append(bar["timestamp"].strftime("%H:%M")), interval_minutes)
+    for hour, minute in times:
+        now = DAY.replace(hour=hour, minute=minute)
+        aggregator.close_due(now)
+        aggregator.add_tick("1", 100.0, now)
+    aggregator.close_due(DAY.replace(hour=15, minute=30))
+    return bars
+
+
+def test_bars_are_anchored_at_the_session_open():
+    times = [(9, 15), (9, 44), (10, 5), (10, 16), (15, 20)]
+    assert stream(30, times) == ["09:15", "09:45", "10:15", "15:15"]
+    assert stream(60, times) == ["09:15", "10:15", "15:15"]
+
+
+def test_last_bar_closes_at_the_session_close():
+    # The 15:15 hourly bar is emitted at 15:30, not at 16:15
+    assert stream(60, [(15, 20)]) == ["15:15"]
+
+
+def test_ticks_outside_the_session_are_dropped():
+    # Pre-open auction prints and post-close ticks must not open a bar
+    assert stream(5, [(9, 5), (9, 14), (15, 30), (15, 45)]) == []
+    assert stream(5, [(9, 10), (9, 15), (15, 29), (15, 31)]) == ["09:15", "15:25"]
+
+
+def test_websocket_and_timer_threads_never_emit_concurrently():
+    active = []
+    overlaps = []
+    emitted = {}
+
+    def on_candle(token, bar):
+        active.append(token)
+        if len(active) > 1:
+            overlaps.append(list(active))
+        time.sleep(0.0005)
+        emitted.setdefault(token, []).append(bar["timestamp"])
+        active.remove(token)
+
+    aggregator = CandleAggregator(on_candle, 5)
+    tokens = [str(i) for i in range(20)]
+    start = DAY.replace(hour=9, minute=15)
+    minutes = 120
+
+    def ticks():
+        for minute in range(minutes):
+            for token in tokens:
+                aggregator.add_tick(token, 100.0, start + timedelta(minutes=minute))
+
+    def timer():
+        for minute in range(minutes):
+            aggregator.close_due(start + timedelta(minutes=minute))
+
+    threads = [threading.Thread(target=ticks), threading.Thread(target=timer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    aggregator.close_due(start + timedelta(minutes=minutes))
+
+    assert overlaps == []
+    expected = [start + timedelta(minutes=5 * i) for i in range(minutes // 5)]
+    for token in tokens:
+        assert emitted[token] == expected
@@ -0,0 +1,39 @@
+import numpy as np
+from universe_matrix import UniverseMatrix
+
+BAR_NS = 300 * 10**9
+
+
+def zigzag(bars, period=12):
+    """
+    Closes that cross MA9/MA20 every few bars.
+    """
+    return 100 + 5 * np.sin(2 * np.pi * np.arange(bars) / period)
+
+
+def test_row_first_appended_late_only_alerts_on_fresh_depth():
+    matrix = UniverseMatrix(["A", "B"], window=128)
+    closes = zigzag(200)
+    timestamps = np.arange(1, 201) * BAR_NS
+
+    # Cycle 1: B's fetch fails, only A gets bars
+    matrix.append("A", timestamps[:150], closes[:150])
+    matrix.crossovers(3)
+    matrix.mark_scanned()
+
+    # Cycle 2: B's full history arrives; it is still a warm-up for B
+    matrix.append("A", timestamps[:151], closes[:151])
+    matrix.append("B", timestamps[:151], closes[:151])
+    bullish, bearish, alert_bars = matrix.crossovers(3)
+    row = matrix.index["B"]
+    assert alert_bars[row] == 3
+    assert alert_bars[matrix.index["A"]] == 1
+    assert (bullish[row] | bearish[row]).sum() <= 1
+
+
+def test_mark_scanned_clears_pending_and_fresh_of_appended_rows():
+    matrix = UniverseMatrix(["A", "B"], window=64)
+    matrix.append("A", np.arange(1, 41) * BAR_NS, zigzag(40))
+    matrix.mark_scanned()
+    assert list(matrix.pending) == [0, 0]
+    assert list(matrix.fresh) == [0, 1]
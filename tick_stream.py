@@ -0,0 +1,210 @@
+import json
+import threading
+from datetime import datetime, timedelta
+import pytz
+from market_calendar import MARKET_CLOSE, MARKET_OPEN
+from utils import get_logger, get_ist_time
+
+logger = get_logger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# SmartWebSocketV2 exchange types
+EXCHANGE_TYPES = {"NSE": 1, "NFO": 2, "BSE": 3, "BFO": 4, "MCX": 5, "NCDEX": 7, "CDS": 13}
+QUOTE_MODE = 2
+
+
+def parse_tick(data):
+    """
+    Normalises a SmartWebSocketV2 tick into (token, price, timestamp, day_volume).
+    Prices arrive in paise and timestamps as epoch milliseconds.
+    """
+    token = str(data["token"])
+    price = data["last_traded_price"] / 100.0
+    timestamp = datetime.fromtimestamp(data["exchange_timestamp"] / 1000.0, IST).replace(tzinfo=None)
+    return token, price, timestamp, data.get("volume_trade_for_the_day")
+
+
+class CandleAggregator:
+    """
+    Builds OHLCV candles per token from ticks and emits each one once its bar has closed.
+    Candle timestamps mark the bar start, matching SmartAPI's getCandleData.
+    add_tick (WebSocket thread) and close_due (timer thread) emit under one lock, so
+    on_candle never runs concurrently and each token's candles arrive in order.
+    """
+
+    def __init__(self, on_candle, interval_minutes=5):
+        self.on_candle = on_candle
+        self.interval = timedelta(minutes=interval_minutes)
+        self._bars = {}
+        self._day_volume = {}
+        self._emitted = {}
+        self._lock = threading.Lock()
+
+    def _bar_start(self, timestamp):
+        # Bars are anchored at the 09:15 session open, like SmartAPI and resample_candles
+        # (60-minute bars start at 09:15, 10:15, ...), not at the top of the hour
+        session_open = datetime.combine(timestamp.date(), MARKET_OPEN)
+        return session_open + ((timestamp - session_open) // self.interval) * self.interval
+
+    def _close_time(self, bar):
+        # The last bar of the day ends at the session close even if it is shorter
+        end = bar["timestamp"] + self.interval
+        session_close = datetime.combine(bar["timestamp"].date(), MARKET_CLOSE)
+        return min(end, session_close) if bar["timestamp"] < session_close else end
+
+    def add_tick(self, token, price, timestamp, day_volume=None):
+        """
+        Folds one tick into its token's forming bar. Ticks outside the 09:15-15:30
+        session (pre-open auction, post-close) and ticks belonging to an already
+        emitted bar are dropped.
+        """
+        if not MARKET_OPEN <= timestamp.time() < MARKET_CLOSE:
+            logger.debug(f"Dropping out-of-session tick for {token} at {timestamp}")
+            return
+
+        start = self._bar_start(timestamp)
+
+        with self._lock:
+            bar = self._bars.get(token)
+            # A tick can also trail a bar the timer has already closed and emitted
+            if (bar is not None and start < bar["timestamp"]) or start <= self._emitted.get(token, start - self.interval):
+                logger.debug(f"Dropping late tick for {token} at {timestamp}")
+                return
+
+            # Day volume is cumulative, so a bar's volume is the growth since the previous tick
+            volume = 0.0
+            if day_volume is not None:
+                previous = self._day_volume.get(token)
+                if previous is not None and day_volume >= previous:
+                    volume = float(day_volume - previous)
+                self._day_volume[token] = day_volume
+
+            if bar is not None and start > bar["timestamp"]:
+                self._emit(token)
+                bar = None
+
+            if bar is None:
+                self._bars[token] = {
+                    "timestamp": start, "open": price, "high": price,
+                    "low": price, "close": price, "volume": volume,
+                }
+            else:
+                bar["high"] = max(bar["high"], price)
+                bar["low"] = min(bar["low"], price)
+                bar["close"] = price
+                bar["volume"] += volume
+
+    def close_due(self, now):
+        """
+        Emits every forming bar whose close time is at or before 'now'.
+        """
+        with self._lock:
+            due = [token for token, bar in self._bars.items() if self._close_time(bar) <= now]
+            for token in due:
+                self._emit(token)
+
+    def _emit(self, token):
+        # Called with the lock held
+        bar = self._bars.pop(token)
+        self._emitted[token] = bar["timestamp"]
+        self.on_candle(token, bar)
+
+
+class ReplayTickSource:
+    """
+    Feeds recorded ticks (one JSON tick per line, as written by SmartApiTickSource)
+    through an aggregator, advancing a simulated clock so bars close exactly as live.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def run(self, aggregator):
+        count = 0
+        last_timestamp = None
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                token, price, timestamp, day_volume = parse_tick(json.loads(line))
+                aggregator.close_due(timestamp)
+                aggregator.add_tick(token, price, timestamp, day_volume)
+                last_timestamp = timestamp
+                count += 1
+
+        if last_timestamp is not None:
+            # End of recording: close whatever is still forming
+            aggregator.close_due(last_timestamp + aggregator.interval)
+        logger.info(f"Replayed {count} ticks from {self.path}")
+
+
+class SmartApiTickSource:
+    """
+    Subscribes to the SmartAPI market-data WebSocket and forwards ticks to an aggregator.
+    A timer thread closes bars on the clock, so a candle is emitted at its close even
+    if no further tick arrives for that symbol.
+    """
+
+    def __init__(self, client, symbols_map, record_path=None, settle_seconds=1.0):
+        self.client = client
+        self.symbols_map = symbols_map
+        self.record_path = record_path
+        self.settle = timedelta(seconds=settle_seconds)
+        self._record_file = None
+        self._stop = threading.Event()
+
+    def _token_list(self):
+        grouped = {}
+        for details in self.symbols_map.values():
+            exchange_type = EXCHANGE_TYPES[details["exchange"]]
+            grouped.setdefault(exchange_type, []).append(details["token"])
+        return [{"exchangeType": exchange_type, "tokens": tokens} for exchange_type, tokens in grouped.items()]
+
+    def _close_loop(self, aggregator):
+        while not self._stop.wait(1.0):
+            aggregator.close_due(get_ist_time().replace(tzinfo=None) - self.settle)
+
+    def run(self, aggregator):
+        from SmartApi.smartWebSocketV2 import SmartWebSocketV2
+
+        sws = SmartWebSocketV2(
+            self.client.session["jwtToken"],
+            self.client.api_key,
+            self.client.client_id,
+            self.client.smart_api.getfeedToken(),
+        )
+        if self.record_path:
+            self._record_file = open(self.record_path, "a")
+
+        def on_open(wsapp):
+            logger.info(f"WebSocket connected. Subscribing to {len(self.symbols_map)} symbols...")
+            sws.subscribe("ma_alert", QUOTE_MODE, self._token_list())
+
+        def on_data(wsapp, data):
+            try:
+                if self._record_file:
+                    self._record_file.write(json.dumps(data) + "\n")
+                aggregator.add_tick(*parse_tick(data))
+            except Exception as e:
+                logger.error(f"Error handling tick: {e}")
+
+        def on_error(*args):
+            logger.error(f"WebSocket error: {args}")
+
+        def on_close(wsapp):
+            logger.warning("WebSocket connection closed.")
+
+        sws.on_open = on_open
+        sws.on_data = on_data
+        sws.on_error = on_error
+        sws.on_close = on_close
+
+        closer = threading.Thread(target=self._close_loop, args=(aggregator,), daemon=True)
+        closer.start()
+        try:
+            sws.connect()
+        finally:
+            self._stop.set()
+            if self._record_file:
+                self._record_file.close()
@@ -0,0 +1,90 @@
+import pandas as pd
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=15)
+SESSION_CLOSE = pd.Timedelta(hours=15, minutes=30)
+
+# SmartAPI getCandleData interval names by bar length in minutes
+INTERVALS = {
+    1: "ONE_MINUTE", 3: "THREE_MINUTE", 5: "FIVE_MINUTE", 10: "TEN_MINUTE",
+    15: "FIFTEEN_MINUTE", 30: "THIRTY_MINUTE", 60: "ONE_HOUR",
+}
+
+
+def resample_candles(df, minutes):
+    """
+    Aggregates finer candles into 'minutes'-long bars anchored at the 09:15 session open
+    of each day (so 60-minute bars are 09:15, 10:15, ..., 15:15).
+    Returns the bars with an extra 'close_time' column (bar end, capped at 15:30).
+    """
+    length = pd.Timedelta(minutes=minutes)
+    day = df['timestamp'].dt.normalize()
+    session_start = day + SESSION_OPEN
+    bucket = session_start + ((df['timestamp'] - session_start) // length) * length
+
+    bars = df.groupby(bucket.rename("timestamp"), sort=True).agg(
+        open=("open", "first"), high=("high", "max"), low=("low", "min"),
+        close=("close", "last"), volume=("volume", "sum"),
+    ).reset_index()
+    bars['close_time'] = (bars['timestamp'] + length).clip(upper=bars['timestamp'].dt.normalize() + SESSION_CLOSE)
+    return bars
+
+
+class TimeframeResampler:
+    """
+    Keeps confirmed higher-timeframe bars per symbol, built in memory from 1-minute candles.
+    Each update only re-aggregates from the last stored bar onwards instead of the whole history.
+    """
+
+    def __init__(self, minutes, max_bars=500):
+        self.minutes = minutes
+        self.max_bars = max_bars
+        self._bars = {}
+
+    def update(self, key, minute_df, now):
+        """
+        Folds the latest 1-minute candles into the bars for 'key' and returns all confirmed bars.
+        """
+        if minute_df is None or len(minute_df) == 0:
+            return self._bars.get(key)
+
+        bars = self._bars.get(key)
+        if bars is None or len(bars) == 0:
+            tail = minute_df
+            kept = None
+        else:
+            # Confirmed bars never change; re-aggregate only from the last one onwards
+            rebuild_from = bars['timestamp'].iloc[-1]
+            tail = minute_df[minute_df['timestamp'] >= rebuild_from]
+            kept = bars[bars['timestamp'] < rebuild_from]
+
+        new_bars = resample_candles(tail, self.minutes)
+        if kept is None and len(new_bars) > 0 and new_bars['timestamp'].iloc[0] < minute_df['timestamp'].iloc[0]:
+            # History starts mid-bar, so the first bar would be incomplete
+            new_bars = new_bars.iloc[1:]
+        new_bars = new_bars[new_bars['close_time'] <= now].drop(columns="close_time")
+
+        bars = new_bars if kept is None else pd.concat([kept, new_bars], ignore_index=True)
+        bars = bars.iloc[-self.max_bars:].reset_index(drop=True)
+        self._bars[key] = bars
+        return bars
+
+
+def parse_timeframes(value):
+    """
+    Parses a comma-separated list of bar lengths in minutes (e.g. "5,15,60").
+    """
+    return sorted({int(part) for part in str(value).split(",") if part.strip()})
+
+
+def base_interval(timeframes):
+    """
+    Returns the bar length to fetch from SmartAPI: the timeframe itself when only one
+    is scanned, otherwise 1-minute candles that every timeframe is resampled from.
+    """
+    if len(timeframes) == 1 and timeframes[0] in INTERVALS:
+        return timeframes[0]
+    return 1
+
@@ -0,0 +1,177 @@
+import atexit
+import json
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+FAST_PERIOD = 9
+SLOW_PERIOD = 20
+# Moving averages are rounded to this many decimals before they are compared. Averages
+# of paise-rounded prices that are mathematically equal then compare equal instead of
+# by floating-point noise, while real differences (at least ~0.00005) are untouched.
+MA_DECIMALS = 8
+
+
+def window_means(closes, period, count):
+    """
+    Mean of each of the last 'count' windows of 'period' columns, for every row at once.
+    Returns a rows x count array; a window with any NaN gives NaN.
+    """
+    windows = sliding_window_view(closes[:, closes.shape[1] - period - count + 1:], period, axis=1)
+    return np.round(windows.mean(axis=2), MA_DECIMALS)
+
+
+class UniverseMatrix:
+    """
+    Confirmed closes of every scanned symbol/timeframe ("row") in one contiguous
+    rows x window float64 block: newest bar in the last column, NaN where a row has
+    fewer bars. Appending shifts a row left in place, so each row is a rolling window of
+    its latest 'window' bars and MA9/MA20 plus the crossover masks for the whole universe
+    come from a single vectorized pass.
+
+    All arrays live in one buffer laid out as
+        header int64[3] (rows, window, label bytes) | labels as JSON, padded to 8 bytes |
+        closes float64[rows, window] | timestamps int64[rows, window] (epoch ns) |
+        pending int64[rows] (bars not scanned yet) | fresh int64[rows] (never scanned)
+    With 'name' the buffer is a multiprocessing SharedMemory block that other processes
+    can map with UniverseMatrix.attach(name) to read the closes and moving averages.
+    Readers should only read between cycles: rows are rewritten during a scan.
+    """
+
+    def __init__(self, labels, window=128, name=None):
+        if window <= SLOW_PERIOD:
+            raise ValueError(f"Window must be longer than {SLOW_PERIOD} bars")
+        encoded = json.dumps(list(labels)).encode()
+        label_bytes = len(encoded) + (-len(encoded) % 8)
+        rows = len(labels)
+        size = 8 * (3 + label_bytes // 8 + 2 * rows * window + 2 * rows)
+
+        self.shm = None
+        if name:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            buffer = self.shm.buf
+            # Unlinked at exit even if nobody calls close()
+            atexit.register(self.close)
+        else:
+            buffer = bytearray(size)
+        self.owner = True
+
+        header = np.ndarray(3, dtype=np.int64, buffer=buffer)
+        header[:] = [rows, window, label_bytes]
+        np.ndarray(label_bytes, dtype=np.uint8, buffer=buffer, offset=24)[:] = np.frombuffer(encoded.ljust(label_bytes), dtype=np.uint8)
+        self._map(buffer, list(labels), window, 24 + label_bytes)
+
+        self.closes[:] = np.nan
+        self.timestamps[:] = 0
+        self.pending[:] = 0
+        self.fresh[:] = 1
+
+    def _map(self, buffer, labels, window, offset):
+        rows = len(labels)
+        self.labels = labels
+        self.index = {label: row for row, label in enumerate(labels)}
+        self.window = window
+        self.closes = np.ndarray((rows, window), dtype=np.float64, buffer=buffer, offset=offset)
+        offset += self.closes.nbytes
+        self.timestamps = np.ndarray((rows, window), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += self.timestamps.nbytes
+        self.pending = np.ndarray(rows, dtype=np.int64, buffer=buffer, offset=offset)
+        self.fresh = np.ndarray(rows, dtype=np.int64, buffer=buffer, offset=offset + 8 * rows)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Maps a matrix another process created under 'name'. The creator keeps ownership:
+        closing an attached matrix never unlinks the block.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        # Attaching registers the block with this process's resource tracker, which would
+        # unlink it when this process exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+        rows, window, label_bytes = np.ndarray(3, dtype=np.int64, buffer=shm.buf)
+        labels = json.loads(bytes(shm.buf[24:24 + label_bytes]).rstrip())
+        matrix = cls.__new__(cls)
+        matrix.shm = shm
+        matrix.owner = False
+        matrix._map(shm.buf, labels, int(window), 24 + int(label_bytes))
+        return matrix
+
+    @property
+    def name(self):
+        return self.shm.name if self.shm is not None else None
+
+    def close(self):
+        if self.shm is None:
+            return
+        shm, self.shm = self.shm, None
+        # Drop the views into the block before releasing it
+        self.closes = self.timestamps = self.pending = self.fresh = None
+        shm.close()
+        if self.owner:
+            shm.unlink()
+
+    def append(self, label, timestamps, closes):
+        """
+        Appends the bars of one row that are newer than its latest stored bar.
+        'timestamps' (datetime64 or epoch ns) and 'closes' are the row's confirmed bars in
+        time order, e.g. the full cached history; only the new tail is copied.
+        Returns the number of new bars.
+        """
+        row = self.index[label]
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype != np.int64:
+            timestamps = timestamps.astype("datetime64[ns]", copy=False).view(np.int64)
+        start = np.searchsorted(timestamps, self.timestamps[row, -1], side="right")
+        count = len(timestamps) - start
+        if count <= 0:
+            return 0
+
+        if count > self.window - SLOW_PERIOD and not self.fresh[row]:
+            logger.warning(f"{label}: {count} new bars exceed the {self.window}-bar window; older ones are not scanned")
+        kept = min(count, self.window)
+        # Overlapping slice assignment: numpy copies through a buffer when needed
+        self.closes[row, :self.window - kept] = self.closes[row, kept:]
+        self.timestamps[row, :self.window - kept] = self.timestamps[row, kept:]
+        self.closes[row, self.window - kept:] = np.asarray(closes, dtype=np.float64)[-kept:]
+        self.timestamps[row, self.window - kept:] = timestamps[-kept:]
+        self.pending[row] = min(self.pending[row] + count, self.window)
+        return count
+
+    def moving_averages(self):
+        """
+        Latest MA9 and MA20 of every row (NaN for rows with too few bars).
+        """
+        return window_means(self.closes, FAST_PERIOD, 1)[:, 0], window_means(self.closes, SLOW_PERIOD, 1)[:, 0]
+
+    def crossovers(self, fresh_depth=3):
+        """
+        MA9/MA20 crossovers on every row's unscanned bars, in one pass over the matrix.
+        Rows never scanned before only alert on their last 'fresh_depth' bars (the rest
+        just warms the averages). Returns (bullish, bearish, alert_bars): boolean
+        rows x depth masks whose column j is the bar depth - j from the end of the row,
+        and each row's number of bars eligible to alert.
+        Call mark_scanned() once the signals have been handled.
+        """
+        alert_bars = np.where(self.fresh == 1, np.minimum(self.pending, fresh_depth), self.pending)
+        alert_bars = np.minimum(alert_bars, self.window - SLOW_PERIOD)
+        depth = int(alert_bars.max()) if len(alert_bars) else 0
+        if depth == 0:
+            empty = np.zeros((len(self.labels), 0), dtype=bool)
+            return empty, empty, alert_bars
+
+        # Averages for the last depth + 1 bars: each bar compares with the one before it
+        ma9 = window_means(self.closes, FAST_PERIOD, depth + 1)
+        ma20 = window_means(self.closes, SLOW_PERIOD, depth + 1)
+        eligible = np.arange(depth) >= (depth - alert_bars)[:, None]
+        bullish = (ma9[:, :-1] <= ma20[:, :-1]) & (ma9[:, 1:] > ma20[:, 1:]) & eligible
+        bearish = (ma9[:, :-1] >= ma20[:, :-1]) & (ma9[:, 1:] < ma20[:, 1:]) & eligible
+        return bullish, bearish, alert_bars
+
+    def mark_scanned(self):
+        # Only rows that got bars this cycle are warm now; a row whose first fetch failed
+        # must still treat its eventual history as a warm-up, not as new bars
+        self.fresh[self.pending > 0] = 0
+        self.pending[:] = 0
@@ -1,21 +1,105 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import multiprocessing
+import queue
 import pytz
 from datetime import datetime
 
 import os
+from config import Config
 
 # Configure Logging
 basedir = os.path.abspath(os.path.dirname(__file__))
 log_path = os.path.join(basedir, "app.log")
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_path),
-        logging.StreamHandler()
-    ]
-)
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# LogRecord attributes that are not user-supplied `extra=` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger and message, plus any `extra=` fields.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() renders the message in the calling thread; leave that (and the
+    # JSON encoding) to the listener thread instead.
+    def prepare(self, record):
+        return record
+
+
+def _file_handler():
+    # Spawned worker processes get their own file so rotation never races between processes
+    process_name = multiprocessing.current_process().name
+    path = log_path if process_name == "MainProcess" else os.path.join(basedir, f"app-{process_name}.log")
+
+    if Config.LOG_ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=Config.LOG_ROTATE_WHEN, backupCount=Config.LOG_BACKUP_COUNT
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=Config.LOG_MAX_BYTES, backupCount=Config.LOG_BACKUP_COUNT
+        )
+    handler.setFormatter(JsonFormatter() if Config.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def parse_log_levels(value):
+    """
+    Parses per-module levels, e.g. "smartapi_client=DEBUG,telegram_alerts=WARNING".
+    """
+    levels = {}
+    for part in (value or "").split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """
+    Routes every record through an in-memory queue to a background listener that writes
+    the rotating log file and the console, so callers never block on disk I/O.
+    """
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, _file_handler(), stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(Config.LOG_LEVEL.upper())
+    for name, level in parse_log_levels(Config.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    listener.start()
+    # Flushes whatever is still queued on exit
+    atexit.register(listener.stop)
+    return listener
+
+
+log_listener = configure_logging()
 
 def get_logger(name):
     """Returns a configured logger instance."""